@@ -2,74 +2,67 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import json
 import sys
-import pandas as pd
+import argparse
+import logging
+import cProfile
+import io
+import pstats
+import platform
+import math
+import time
+import random
+import threading
+import gzip
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from jira import JIRA
-from copy import copy
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+from jira_kpi_report_async import AsyncJiraTransport, AIOHTTP_AVAILABLE
+from jira_kpi_report_store import IssueStore
+from jira_kpi_report_history import KpiHistory
+# numpy, pandas, the jira client and openpyxl took most of the start-up time, so they are imported
+# by the stage that needs them: a --check or --fetch-only run never loads openpyxl or pandas.
+
+# orjson decodes large search pages (whole worklog arrays) and the data snapshot several times faster
+# than the json module; without it the json module is used
+try:
+    from orjson import dumps as json_dumps_bytes, loads as json_loads
+except ImportError:
+    def json_dumps_bytes(value):
+        return json.dumps(value).encode('utf-8')
+    json_loads = json.loads
+
+logger = logging.getLogger('jira_kpi_report')
 
 # Import mock data generator for BA TEAM
 try:
     from mock_ba_data import generate_mock_ba_data
 except ImportError:
-    # Define a fallback mock data generator in case the import fails
+    # Fall back to the built-in synthetic data generator if the import fails
     def generate_mock_ba_data():
-        print("WARNING: mock_ba_data.py not found, using empty mock data")
-        return {
-            'BA TEAM': {
-                category: {
-                    'prev': {member: {'To Do': 0, 'In Development': 0, 'Completed': 0, 'Declined': 0} 
-                            for member in ['Bohdan Kucher', 'Polina Reminna', 'Stepan Zhukevych']},
-                    'pre_prev': {member: {'To Do': 0, 'In Development': 0, 'Completed': 0, 'Declined': 0}
-                                for member in ['Bohdan Kucher', 'Polina Reminna', 'Stepan Zhukevych']},
-                    'tasks': {'prev': {}, 'pre_prev': {}}
-                }
-                for category in ['ASAP BA changes', 'Change requests BA']
-            }
-        }
+        logger.warning("mock_ba_data.py not found, using synthetic mock data")
+        return generate_synthetic_data({'BA TEAM': TEAMS['BA TEAM']})
 
 # Import mock data generator for AMA TEAM
 try:
     from mock_ama_data import generate_mock_ama_data
 except ImportError:
-    # Define a fallback mock data generator in case the import fails
+    # Fall back to the built-in synthetic data generator if the import fails
     def generate_mock_ama_data():
-        print("WARNING: mock_ama_data.py not found, using empty mock data")
-        return {
-            'AMA TEAM': {
-                category: {
-                    'prev': {member: {'To Do': 0, 'In Development': 0, 'Completed': 0, 'Cancelled': 0} 
-                            for member in ['Andriy Momot', 'Arthur Hlushko', 'Denys Honchar', 
-                                        'Iliya Sozonenko', 'Oleg Nekrasov', 'Oleksandr Korneiko', 
-                                        'Oleksii Petrov']},
-                    'pre_prev': {member: {'To Do': 0, 'In Development': 0, 'Completed': 0, 'Cancelled': 0}
-                                for member in ['Andriy Momot', 'Arthur Hlushko', 'Denys Honchar', 
-                                            'Iliya Sozonenko', 'Oleg Nekrasov', 'Oleksandr Korneiko', 
-                                            'Oleksii Petrov']},
-                    'tasks': {'prev': {}, 'pre_prev': {}}
-                }
-                for category in ['ASAP Changes', 'Change Requests', 'BugFixes']
-            }
-        }
+        logger.warning("mock_ama_data.py not found, using synthetic mock data")
+        return generate_synthetic_data({'AMA TEAM': TEAMS['AMA TEAM']})
 
 # Import mock data generator for LDT, TWA, and CWT teams
 try:
     from mock_ldt_twa_cwt_data import generate_mock_data
 except ImportError:
-    # Define a fallback mock data generator in case the import fails
+    # Fall back to the built-in synthetic data generator if the import fails
     def generate_mock_data():
-        print("WARNING: mock_ldt_twa_cwt_data.py not found, using empty mock data")
-        return {
-            'LDT TEAM': {category: {'prev': {}, 'pre_prev': {}, 'tasks': {'prev': {}, 'pre_prev': {}}}
-                    for category in ['ASAP Changes', 'Change Requests', 'Tech. Tasks', 'BugFixes', 'Client PDF', 'Migration']},
-            'TWA TEAM': {category: {'prev': {}, 'pre_prev': {}, 'tasks': {'prev': {}, 'pre_prev': {}}}
-                    for category in ['ASAP Changes', 'Change Requests', 'Tech. Tasks', 'BugFixes', 'Client PDF', 'Migration']},
-            'CWT TEAM': {category: {'prev': {}, 'pre_prev': {}, 'tasks': {'prev': {}, 'pre_prev': {}}}
-                    for category in ['ASAP Changes', 'Change Requests', 'Tech. Tasks', 'BugFixes', 'Client PDF', 'Migration']},
-        }
+        logger.warning("mock_ldt_twa_cwt_data.py not found, using synthetic mock data")
+        return generate_synthetic_data({team_name: TEAMS[team_name] for team_name in ['LDT TEAM', 'TWA TEAM', 'CWT TEAM']})
 
 # Jira connection details
 JIRA_SERVER = 'https://arbostar.atlassian.net'
@@ -109,9 +102,63 @@ PREV_SPRINT_END = "-7d"
 PRE_PREV_SPRINT_START = "-42d" 
 PRE_PREV_SPRINT_END = "-28d"   
 
+# Report periods and their date ranges, keyed the same way as the 'prev' / 'pre_prev' data in all_data
+SPRINT_PERIODS = {
+    'prev': (PREV_SPRINT_START, PREV_SPRINT_END),
+    'pre_prev': (PRE_PREV_SPRINT_START, PRE_PREV_SPRINT_END),
+}
+
+# Multi-sprint trend (--trend-sprints N): the report can also cover TREND_SPRINT_COUNT consecutive sprints of
+# TREND_SPRINT_LENGTH_DAYS days, the first one starting on TREND_FIRST_SPRINT_START ('YYYY-MM-DD'; None means the
+# last sprints up to today). They are fetched together with SPRINT_PERIODS over one date range, bucketed into
+# sprints locally and shown on the "Trends" sheet.
+TREND_SPRINT_COUNT = 0
+TREND_SPRINT_LENGTH_DAYS = 14
+TREND_FIRST_SPRINT_START = None
+TREND_CHART_MAX_MEMBERS = 12  # larger teams are charted by their team total only
+
+# Trend sprints of the current run, {period: (start, end)} keyed by the sprint's start date; set by set_trend_periods()
+TREND_PERIODS = {}
+
 # Template path
 OUTPUT_PATH = "sprint_report.xlsx"
 
+# How the workbook is written:
+# 'streaming' - openpyxl write-only mode: task rows are written to disk as soon as they are complete,
+#               so memory use doesn't grow with the number of tasks
+# 'openpyxl'  - regular in-memory openpyxl workbook, built completely before it is saved
+XLSX_WRITER_BACKEND = 'streaming'
+
+# Logging: the console shows INFO messages (WARNING and up with --quiet, everything with --verbose).
+# If LOG_FILE (or --log-file) is set, the full DEBUG trace (every query, issue and worklog) is also
+# written there as JSON lines.
+LOG_FILE = None
+
+# Every run writes a JSON summary (phase timings, item counts, settings) next to the workbook,
+# e.g. sprint_report.run.json. With --profile the run is also profiled with cProfile into sprint_report.prof.
+WRITE_RUN_SUMMARY = True
+PROFILE_TOP_FUNCTIONS = 25  # functions listed in the log by --profile
+
+# Export of the report's dataset next to the workbook (or --export FORMAT, repeatable), for BI jobs that would
+# otherwise parse the workbook: task records, member x day worklog hours, per-member KPIs and status counts,
+# one file each, e.g. sprint_report.tasks.parquet. Formats: 'parquet' (columnar, compressed with
+# PARQUET_COMPRESSION; needs pyarrow or fastparquet), 'csv' and 'jsonl' (JSON lines).
+EXPORT_FORMATS = []
+PARQUET_COMPRESSION = 'zstd'
+
+# The report runs in three stages: fetch (Jira -> all_data and the worklog hours table), compute (rollups) and
+# render (workbook and exports). After the fetch stage the data is saved as a gzipped JSON snapshot
+# (e.g. sprint_report.snapshot.json.gz), so the report can be rendered again without Jira: --render-only
+# uses that snapshot, --from-snapshot PATH another one, and --fetch-only stops after saving it.
+WRITE_SNAPSHOT = True
+SNAPSHOT_VERSION = 1
+
+# --check validates the configuration and the Jira credentials (one /myself request over the standard library)
+# without fetching anything or loading the report libraries, for schedulers that want a cheap preflight.
+CHECK_TIMEOUT_SECONDS = 5
+# Libraries the fetch, compute and render stages import when they run
+REPORT_LIBRARIES = ['jira', 'numpy', 'pandas', 'openpyxl']
+
 # Status mappings for LDT, TWA, and CWT teams
 STATUS_MAPPING = {
     'TO_DO': ['To Do'],
@@ -148,33 +195,63 @@ TEAM_STATUS_MAPPINGS = {
     'CWT TEAM': STATUS_MAPPING
 }
 
+# Status mapping keys and the status category they map to, in the order they are checked:
+# a status listed under several keys gets the first category
+STATUS_CATEGORY_KEYS = [
+    ('TO_DO', 'To Do'),
+    ('IN_DEV', 'In Development'),
+    ('COMPLETED', 'Completed'),
+    ('DECLINED', 'Declined'),
+    ('CANCELLED', 'Cancelled'),
+]
+
+def compile_status_mapping(status_mapping):
+    """Compile a status mapping into a {Jira status: status category} lookup table."""
+    status_lookup = {}
+    for mapping_key, status_category in STATUS_CATEGORY_KEYS:
+        for status in status_mapping.get(mapping_key, []):
+            status_lookup.setdefault(status, status_category)
+    return status_lookup
+
+# Status lookup tables, compiled once per team mapping
+DEFAULT_STATUS_LOOKUP = compile_status_mapping(STATUS_MAPPING)
+TEAM_STATUS_LOOKUPS = {team_name: compile_status_mapping(status_mapping)
+                       for team_name, status_mapping in TEAM_STATUS_MAPPINGS.items()}
+
+def team_status_categories(team_name):
+    """Return the status categories reported for a team: To Do, In Development, Completed plus Declined / Cancelled if its mapping has them."""
+    status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
+    return [status_category for mapping_key, status_category in STATUS_CATEGORY_KEYS
+            if mapping_key in status_mapping or status_category in ('To Do', 'In Development', 'Completed')]
+
 # Task categories - RESTORED TO ORIGINAL JQL QUERIES FROM YOUR FILE
+# {date_start} / {date_end} are replaced with the period dates and {assignee} with the assignee(s)
 TASK_CATEGORIES = {
     'ASAP Changes': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype="Change request" AND Release[Dropdown]=ASAP  and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
-        'ama_query': '(project = "AMA") AND issuetype="Change request" and Release[Dropdown]=ASAP and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype="Change request" AND Release[Dropdown]=ASAP  and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
+        'ama_query': '(project = "AMA") AND issuetype="Change request" and Release[Dropdown]=ASAP and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
     },
     'Change Requests': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype="Change request" AND Release[Dropdown] IS EMPTY  and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
-        'ama_query': '(project = "AMA") AND issuetype="Change request" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype="Change request" AND Release[Dropdown] IS EMPTY  and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
+        'ama_query': '(project = "AMA") AND issuetype="Change request" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
     },
     'Tech. Tasks': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype = \'Task\' AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
-        'ama_query': '(project = "AMA") AND issuetype = "Task" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype = \'Task\' AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}"  and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
+        'ama_query': '(project = "AMA") AND issuetype = "Task" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
     },
     'BugFixes': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype = "Bug" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d"  and statusCategoryChangedDate <= "-7d" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
-        'ama_query': '(project = "AMA") AND issuetype = "Bug" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND issuetype = "Bug" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}"  and statusCategoryChangedDate <= "{date_end}" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}',
+        'ama_query': '(project = "AMA") AND issuetype = "Bug" AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("Ready to test", "Test passed", "Test pre-release", "Ready for release", "Released", "Cancelled") and assignee = {assignee}'
     },
     'Client PDF': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND "Epic Link" = TWA-3303 AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND "Epic Link" = TWA-3303 AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}'
     },
     'Migration': {
-        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND "Epic Link" = TWA-3306 AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}'
+        'query': '(project = "TWA" OR project = "LDT" OR project = "CWT") AND "Epic Link" = TWA-3306 AND Release[Dropdown] IS EMPTY and statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" and  status not in ("DEV", "Merge to Staging", "Staging", "HOTFIX", "Merge to Master", "MASTER", "Ready for release") and assignee = {assignee}'
     },
     # For BA team categories - now just one category
     'Change Requests BA': {
-        'query': '(project = "Features and Ideas")  AND statusCategoryChangedDate >= "-21d" and statusCategoryChangedDate <= "-7d" AND assignee = {assignee}'
+        'query': '(project = "Features and Ideas")  AND statusCategoryChangedDate >= "{date_start}" and statusCategoryChangedDate <= "{date_end}" AND assignee = {assignee}'
     }
 }
 
@@ -192,22 +269,536 @@ USE_MOCK_BA_DATA = False
 USE_MOCK_AMA_DATA = False
 USE_MOCK_OTHER_DATA = False  # Flag to use mock data for LDT, TWA, and CWT teams
 
+# Synthetic mock data (used when the mock_* modules are not available); the same seed gives the same data.
+# MOCK_MEMBER_SCALE > 1 adds synthetic members ("Name 2", "Name 3", ...) to the mocked teams in TEAMS,
+# e.g. 100 to render a report with a hundred times the members and tasks.
+MOCK_DATA_SEED = 42
+MOCK_MEMBER_SCALE = 1
+MOCK_TASKS_PER_MEMBER_CATEGORY = 4  # average tasks per member, category and period
+MOCK_STATUS_WEIGHTS = {'To Do': 2, 'In Development': 4, 'Completed': 4, 'Declined': 1, 'Cancelled': 1}
+MOCK_UNMAPPED_STATUS_SHARE = 0.03  # share of tasks in a status missing from the team's mapping ('Other')
+MOCK_STORY_POINTS = [0.0, 1.0, 2.0, 3.0, 5.0, 8.0]
+MOCK_MAX_HOURS_PER_DAY = 8
+
+# Fetch tasks with one `assignee in (...)` JQL per team/category/period instead of one JQL per member.
+# Results are split by assignee locally. Set to False to go back to per-member queries.
+USE_BATCHED_TASK_FETCH = True
+# Fetch all report periods with one query over the whole date span and assign each task to a period
+# locally by its statuscategorychangedate. Set to False to run one query per period.
+USE_COMBINED_WINDOW_FETCH = True
+
+# Concurrent Jira fetching: number of fetch jobs running in parallel (1 = serial).
+# On HTTP 429 the scheduler honours Retry-After, pauses all workers and halves the number of
+# requests in flight, then slowly ramps back up once requests succeed again.
+JIRA_MAX_WORKERS = 4
+JIRA_MAX_RETRIES = 5
+JIRA_RETRY_BASE_DELAY = 2.0  # seconds, doubled on each retry without a Retry-After header
+JIRA_MAX_RETRY_DELAY = 60.0  # seconds
+
+# Use the asyncio transport (pooled keep-alive connections, raw JSON results) for Jira reads.
+# Falls back to the jira client if aiohttp is not installed or the transport can't connect.
+USE_ASYNC_TRANSPORT = True
+ASYNC_MAX_IN_FLIGHT = 8  # Jira requests in flight at once over the shared connection pool
+
+# Keep a local SQLite store of fetched issues and only ask Jira for issues updated since the last run.
+# If Jira can't be reached, the report is built from the (slightly stale) stored issues.
+USE_ISSUE_STORE = False
+ISSUE_STORE_PATH = "jira_issue_store.sqlite"
+ISSUE_STORE_SYNC_OVERLAP_MINUTES = 10  # re-check issues updated shortly before the last sync
+
+# KPI history: periods with absolute dates (trend sprints, or SPRINT_PERIODS set to 'YYYY-MM-DD' dates) that ended
+# more than HISTORY_FREEZE_AFTER_DAYS days ago are frozen in HISTORY_STORE_PATH (task records, status counts, story
+# points and tracked hours). Later runs rebuild them from there instead of fetching them from Jira again.
+# Query the history with jira_kpi_report_history.py.
+USE_HISTORY_STORE = True
+HISTORY_STORE_PATH = "jira_kpi_history.sqlite"
+HISTORY_FREEZE_AFTER_DAYS = 1
+
+# How worklogs are fetched for tracked time:
+# 'feed'   - Jira's bulk worklog endpoints (/worklog/updated + /worklog/list), incremental from the position
+#            stored in ISSUE_STORE_PATH. Complete, unlike the worklog field of search results, which Jira
+#            truncates at 20 entries per issue.
+# 'search' - the `worklog` field of issues found with a worklogDate/worklogAuthor JQL search.
+WORKLOG_FETCH_MODE = 'feed'
+WORKLOG_FEED_INITIAL_LOOKBACK_DAYS = 7  # on the first feed sync, also pick up worklogs updated this long before the report span
+WORKLOG_LIST_BATCH_SIZE = 1000  # maximum number of ids /worklog/list accepts per request
+
+# Upper bound for the length of a single batched JQL string. Long assignee lists are split into
+# several queries so we stay well below Jira's JQL / request URL length limits.
+MAX_JQL_LENGTH = 6000
+
+# Searches are streamed page by page (the next page is requested while the current one is processed),
+# so no result set is capped or held in memory as a whole. Jira Cloud returns at most 100 issues per page.
+SEARCH_PAGE_SIZE = 100
+
+def connect_async_transport():
+    """Open the async Jira transport, or return None to fall back to the jira client"""
+    if not AIOHTTP_AVAILABLE:
+        logger.warning("aiohttp is not installed, falling back to the jira client")
+        return None
+    transport = None
+    try:
+        transport = AsyncJiraTransport(JIRA_SERVER, JIRA_EMAIL, JIRA_API_TOKEN, max_in_flight=ASYNC_MAX_IN_FLIGHT)
+        transport.myself()
+        logger.info("Connected successfully (async transport)!")
+        return transport
+    except Exception as e:
+        logger.warning(f"Async transport failed to connect ({e}), falling back to the jira client")
+        if transport is not None:
+            transport.close()
+        return None
+
 def connect_to_jira():
     """Connect to Jira using API token"""
-    print("Connecting to Jira...")
+    logger.info("Connecting to Jira...")
+    if USE_ASYNC_TRANSPORT:
+        transport = connect_async_transport()
+        if transport is not None:
+            return transport
     try:
-        jira = JIRA(server=JIRA_SERVER, basic_auth=(JIRA_EMAIL, JIRA_API_TOKEN))
-        print("Connected successfully!")
+        from jira import JIRA
+        # Retries are handled by JiraRateLimiter, so all workers back off together on 429
+        jira = JIRA(server=JIRA_SERVER, basic_auth=(JIRA_EMAIL, JIRA_API_TOKEN), max_retries=0)
+        logger.info("Connected successfully!")
         return jira
     except Exception as e:
-        print(f"Failed to connect to Jira: {e}")
+        logger.error(f"Failed to connect to Jira: {e}")
+        if USE_ISSUE_STORE:
+            # The report can still be built from the local issue store
+            return None
         sys.exit(1)
 
-def create_jql_query(category, date_start, date_end, assignee=None, team_name=None):
+class JiraRateLimiter:
+    """
+    Rate-limit-aware gate shared by all fetch workers.
+    Limits the number of Jira requests in flight; on throttling it pauses every worker
+    for the Retry-After delay and halves the limit, then adds one slot back after
+    every few successful requests (additive increase, multiplicative decrease).
+    """
+    RAMP_UP_AFTER = 10  # successful requests needed to allow one more request in flight
+
+    def __init__(self, max_in_flight):
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = self.max_in_flight
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.successes = 0
+        self.throttle_count = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self.condition.wait(pause)
+                elif self.in_flight >= self.limit:
+                    self.condition.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def record_success(self):
+        with self.condition:
+            self.successes += 1
+            if self.limit < self.max_in_flight and self.successes >= self.RAMP_UP_AFTER:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def record_throttle(self, delay):
+        with self.condition:
+            self.throttle_count += 1
+            self.successes = 0
+            self.limit = max(1, self.limit // 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            logger.warning(f"Jira is throttling requests: pausing for {delay:.1f}s, requests in flight limited to {self.limit}")
+
+# Shared by every Jira call made through call_jira()
+JIRA_RATE_LIMITER = JiraRateLimiter(JIRA_MAX_WORKERS)
+
+class RunStats:
+    """
+    Timings and item counts of a report run, written out as the JSON run summary.
+    Phases are timed on the main thread; time spent in a nested phase is not counted again
+    for the enclosing one, so the phases add up to the run time. Fetch jobs run concurrently on
+    worker threads and are recorded separately, as busy time per kind of job.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phase_stack = threading.local()
+        self.start()
+
+    def start(self):
+        """Start collecting for a new run."""
+        self.started_at = datetime.now()
+        self.phases = {}  # name -> {'seconds', 'calls'}
+        self.fetch_jobs = {}  # kind -> {'jobs', 'busy_seconds', 'max_seconds'}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase of the run: `with RUN_STATS.phase('save'): ...`"""
+        stack = self.phase_stack.__dict__.setdefault('frames', [])
+        frame = [time.perf_counter(), 0.0]  # start, time spent in nested phases
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if stack:
+                stack[-1][1] += elapsed
+            with self.lock:
+                phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                phase['seconds'] += elapsed - frame[1]
+                phase['calls'] += 1
+
+    def timed_job(self, kind, func):
+        """Wrap a fetch job function so that its runs are recorded under kind."""
+        def run_job(*args):
+            job_started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - job_started
+                with self.lock:
+                    jobs = self.fetch_jobs.setdefault(kind, {'jobs': 0, 'busy_seconds': 0.0, 'max_seconds': 0.0})
+                    jobs['jobs'] += 1
+                    jobs['busy_seconds'] += elapsed
+                    jobs['max_seconds'] = max(jobs['max_seconds'], elapsed)
+        return run_job
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, status):
+        finished_at = datetime.now()
+        with self.lock:
+            return {
+                'status': status,
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'finished_at': finished_at.isoformat(timespec='seconds'),
+                'total_seconds': round((finished_at - self.started_at).total_seconds(), 3),
+                'phases': {name: {'seconds': round(phase['seconds'], 3), 'calls': phase['calls']}
+                           for name, phase in self.phases.items()},
+                'fetch_jobs': {kind: {'jobs': jobs['jobs'], 'busy_seconds': round(jobs['busy_seconds'], 3),
+                                      'max_seconds': round(jobs['max_seconds'], 3)}
+                               for kind, jobs in self.fetch_jobs.items()},
+                'counters': dict(self.counters),
+                'settings': {
+                    'output_path': OUTPUT_PATH,
+                    'xlsx_writer_backend': XLSX_WRITER_BACKEND,
+                    'worklog_fetch_mode': WORKLOG_FETCH_MODE,
+                    'use_async_transport': USE_ASYNC_TRANSPORT,
+                    'use_issue_store': USE_ISSUE_STORE,
+                    'use_history_store': USE_HISTORY_STORE,
+                    'use_batched_task_fetch': USE_BATCHED_TASK_FETCH,
+                    'use_combined_window_fetch': USE_COMBINED_WINDOW_FETCH,
+                    'trend_sprints': len(TREND_PERIODS),
+                    'jira_max_workers': JIRA_MAX_WORKERS,
+                    'search_page_size': SEARCH_PAGE_SIZE,
+                },
+                'python': platform.python_version(),
+            }
+
+    def write(self, path, status):
+        with open(path, 'w', encoding='utf-8') as summary_file:
+            json.dump(self.summary(status), summary_file, indent=2, ensure_ascii=False)
+
+# Collects the timings and counts of the current run
+RUN_STATS = RunStats()
+
+def get_retry_delay(error, attempt):
+    """Return the delay before retrying a failed Jira request, or None if the error is not retryable."""
+    from jira.exceptions import JIRAError
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+    if isinstance(error, RequestsConnectionError):
+        return min(JIRA_MAX_RETRY_DELAY, JIRA_RETRY_BASE_DELAY * 2 ** attempt)
+    if not isinstance(error, JIRAError) or error.status_code not in (429, 503):
+        return None
+    retry_after = error.response.headers.get('Retry-After') if error.response is not None else None
+    if retry_after:
+        try:
+            return min(JIRA_MAX_RETRY_DELAY, float(retry_after))
+        except ValueError:
+            pass
+    # Exponential backoff with jitter so workers don't retry in lockstep
+    return min(JIRA_MAX_RETRY_DELAY, JIRA_RETRY_BASE_DELAY * 2 ** attempt) * (0.5 + random.random() / 2)
+
+def call_jira(func, *args, **kwargs):
+    """Call a Jira client method under JIRA_RATE_LIMITER, retrying throttled and transient failures."""
+    for attempt in range(JIRA_MAX_RETRIES + 1):
+        RUN_STATS.count('jira_requests')
+        JIRA_RATE_LIMITER.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            # Only throttled requests and dropped connections are retried (see get_retry_delay)
+            delay = get_retry_delay(e, attempt)
+            if delay is None or attempt == JIRA_MAX_RETRIES:
+                raise
+            JIRA_RATE_LIMITER.record_throttle(delay)
+            continue
+        finally:
+            JIRA_RATE_LIMITER.release()
+        JIRA_RATE_LIMITER.record_success()
+        return result
+
+def run_fetch_jobs(jobs, max_workers=JIRA_MAX_WORKERS):
+    """
+    Run fetch jobs on a bounded thread pool.
+    jobs is a dict {job_key: (func, args)}; returns {job_key: result} in the same key order,
+    so results are merged deterministically regardless of completion order.
+    """
+    if max_workers <= 1:
+        return {job_key: func(*args) for job_key, (func, args) in jobs.items()}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jira-fetch') as executor:
+        futures = {job_key: executor.submit(func, *args) for job_key, (func, args) in jobs.items()}
+        return {job_key: future.result() for job_key, future in futures.items()}
+
+def parse_relative_date(relative_str, base_date):
+    """Parse relative date strings like '-7d' (or absolute 'YYYY-MM-DD') to datetimes relative to base_date."""
+    if relative_str.startswith('-') and relative_str.endswith('d'):
+        days_offset = int(relative_str[1:-1])
+        return base_date - timedelta(days=days_offset) # Subtract for past dates
+    # Absolute dates, 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM' (both are valid JQL dates too)
+    for date_format in ("%Y-%m-%d", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(relative_str, date_format)
+        except ValueError:
+            pass
+    logger.warning(f"Unexpected date format '{relative_str}'. Cannot parse to absolute date for internal filtering.")
+    return base_date # Return base date as a fallback if parsing fails
+
+def parse_jira_datetime(value):
+    """Parse a Jira timestamp (e.g. '2023-05-10T12:00:00.000+0000') to a naive local datetime, or None."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z").astimezone().replace(tzinfo=None)
+    except ValueError:
+        logger.warning(f"Could not parse Jira timestamp '{value}'")
+        return None
+
+def get_period_bounds(periods, base_date):
+    """Convert {period: (start, end)} date strings to {period: (start_datetime, end_datetime)}."""
+    return {period: (parse_relative_date(start, base_date), parse_relative_date(end, base_date))
+            for period, (start, end) in periods.items()}
+
+def get_combined_window(periods, base_date):
+    """Return the (start, end) date strings spanning all the given periods."""
+    bounds = get_period_bounds(periods, base_date)
+    span_start = min(periods, key=lambda period: bounds[period][0])
+    span_end = max(periods, key=lambda period: bounds[period][1])
+    return periods[span_start][0], periods[span_end][1]
+
+def build_trend_periods(sprint_count, sprint_length_days, first_sprint_start=None, today=None):
+    """
+    Return sprint_count consecutive sprints of sprint_length_days days as {period: (start, end)} absolute
+    date strings in date order, keyed by the sprint's start date. The end is the last minute of the sprint's
+    last day ('2024-05-19 23:59'), so the JQL date bounds and the local bucketing both include that day.
+    Without first_sprint_start the last sprint ends today.
+    """
+    if sprint_count <= 0:
+        return {}
+    if sprint_length_days <= 0:
+        raise ValueError(f"Sprint length must be a positive number of days, got {sprint_length_days}")
+    if first_sprint_start is None:
+        today = (today or datetime.now()).date()
+        first_day = today - timedelta(days=sprint_count * sprint_length_days - 1)
+    else:
+        first_day = datetime.strptime(first_sprint_start, "%Y-%m-%d").date()
+    trend_periods = {}
+    for sprint_index in range(sprint_count):
+        sprint_start = first_day + timedelta(days=sprint_index * sprint_length_days)
+        sprint_end = sprint_start + timedelta(days=sprint_length_days - 1)
+        trend_periods[f"{sprint_start:%Y-%m-%d}"] = (f"{sprint_start:%Y-%m-%d}", f"{sprint_end:%Y-%m-%d} 23:59")
+    return trend_periods
+
+def set_trend_periods(sprint_count, sprint_length_days, first_sprint_start=None):
+    """Set the trend sprints (TREND_PERIODS) of this run."""
+    TREND_PERIODS.clear()
+    TREND_PERIODS.update(build_trend_periods(sprint_count, sprint_length_days, first_sprint_start))
+
+def get_period_groups():
+    """
+    Period sets the tasks are bucketed into: SPRINT_PERIODS and, if set, TREND_PERIODS.
+    Periods within a set don't overlap; the two sets may (the previous sprint is usually also a trend sprint).
+    """
+    return [SPRINT_PERIODS] + ([TREND_PERIODS] if TREND_PERIODS else [])
+
+def get_report_periods():
+    """All periods the data is collected for: SPRINT_PERIODS followed by TREND_PERIODS."""
+    return {**SPRINT_PERIODS, **TREND_PERIODS}
+
+def is_closed_period(date_start, date_end, now):
+    """True if a period has absolute dates and ended more than HISTORY_FREEZE_AFTER_DAYS days before now."""
+    if date_start.startswith('-') or date_end.startswith('-'):
+        return False
+    return parse_relative_date(date_end, now) < now - timedelta(days=HISTORY_FREEZE_AFTER_DAYS)
+
+def trend_period_label(period):
+    """Column label of a trend sprint, e.g. '06.05 - 19.05'."""
+    start, end = (parse_relative_date(date, datetime.now()) for date in TREND_PERIODS[period])
+    return f"{start:%d.%m} - {end:%d.%m}"
+
+def find_period_for_date(changed_at, period_bounds):
+    """Return the period whose bounds contain changed_at, or None if it falls outside all periods."""
+    if changed_at is None:
+        return None
+    for period, (start, end) in period_bounds.items():
+        if start <= changed_at <= end:
+            return period
+    return None
+
+class SyncedJira:
+    """
+    Serves issue searches from the local IssueStore, syncing each search ("view") incrementally.
+    The upper date bound is dropped from stored views so that issues moving into a period later
+    are already in the store; callers filter periods locally.
+    """
+
+    def __init__(self, jira, store):
+        self.jira = jira
+        self.store = store
+        self.sync_started = datetime.now()
+        self.last_sync = store.get_last_sync()
+        self.changed_keys = None
+        self.since_jql = None
+        self.offline = False
+        self.failed_views = 0
+
+    def prepare(self):
+        """Find the issues updated since the last sync; without Jira, fall back to the stored data."""
+        if self.jira is None:
+            self.offline = True
+            logger.warning("Not connected to Jira. Using data from the issue store.")
+            return
+        if self.last_sync is None:
+            logger.info("Issue store is empty, running a full sync")
+            return
+        minutes = math.ceil((self.sync_started - self.last_sync).total_seconds() / 60) + ISSUE_STORE_SYNC_OVERLAP_MINUTES
+        self.since_jql = f'updated >= "-{minutes}m"'
+        project_clause = ', '.join([f'"{project}"' for project in get_tracked_projects()])
+        try:
+            changed_issues = search_issues_raw(self.jira, f'project in ({project_clause}) AND {self.since_jql}', 'updated')
+            self.changed_keys = [issue['key'] for issue in changed_issues]
+            logger.info(f"Issue store: {len(self.changed_keys)} issues changed since last sync at {self.last_sync:%Y-%m-%d %H:%M}")
+        except Exception as e:
+            self.offline = True
+            logger.warning(f"Could not reach Jira to sync the issue store ({e}). Using stored data from {self.last_sync:%Y-%m-%d %H:%M}.")
+
+    def search(self, jql, fields):
+        view = re.sub(r"\s+and\s+(statusCategoryChangedDate|worklogDate)\s*<=\s*[\"'][^\"']*[\"']", '', jql, flags=re.IGNORECASE)
+        fields = f"{fields},updated"
+        view_state = self.store.get_view_state(view)
+        # A view can be synced incrementally only if it was part of the last complete sync
+        is_current = view_state is not None and view_state == (fields, self.last_sync)
+        if self.offline:
+            if view_state is None:
+                raise RuntimeError(f"Jira is unreachable and the issue store has no data for: {view}")
+            return self.store.get_view_issues(view)
+        try:
+            if is_current and self.changed_keys is not None:
+                if self.changed_keys:
+                    changed_issues = search_issues_raw(self.jira, f"({view}) AND {self.since_jql}", fields)
+                    self.store.update_view(view, fields, self.changed_keys, changed_issues, self.sync_started)
+                else:
+                    self.store.update_view(view, fields, [], [], self.sync_started)
+            else:
+                self.store.replace_view(view, fields, search_issues_raw(self.jira, view, fields), self.sync_started)
+        except Exception:
+            self.failed_views += 1
+            if view_state is None:
+                raise
+            logger.warning(f"Sync failed for a stored view, using stored data: {view}")
+        return self.store.get_view_issues(view)
+
+    def finish(self):
+        """Record the sync time once every view has been synced successfully."""
+        if not self.offline and not self.failed_views:
+            self.store.set_last_sync(self.sync_started)
+
+def fetch_search_page(jira, jql, fields, start_at, page_size):
+    """Fetch one page of a search as (raw issue dicts, total number of matching issues)."""
+    # Works on the raw JSON page: jira.search_issues would build an Issue resource for every hit
+    page = get_jira_json(jira, 'search', params={'jql': jql, 'fields': fields, 'startAt': start_at, 'maxResults': page_size})
+    issues = page.get('issues', [])
+    return issues, page.get('total', start_at + len(issues))
+
+def iter_search_pages(jira, jql, fields, page_size=SEARCH_PAGE_SIZE):
+    """
+    Yield the results of a search page by page as lists of raw issue dicts.
+    The next page is requested on a helper thread while the caller processes the current one.
+    Searches served by the local issue store are yielded from the store in pages of the same size.
+    """
+    if isinstance(jira, SyncedJira):
+        issues = jira.search(jql, fields)
+        for start in range(0, len(issues), page_size):
+            yield issues[start:start + page_size]
+        return
+    prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jira-prefetch')
+    try:
+        next_page = prefetcher.submit(fetch_search_page, jira, jql, fields, 0, page_size)
+        start_at = 0
+        while next_page is not None:
+            issues, total = next_page.result()
+            start_at += len(issues)
+            # Jira may return fewer issues than asked for; page by what it actually returned
+            next_page = None
+            if issues and start_at < total:
+                next_page = prefetcher.submit(fetch_search_page, jira, jql, fields, start_at, page_size)
+            yield issues
+    finally:
+        # Also reached when the caller stops iterating early; drop the prefetched page
+        prefetcher.shutdown(wait=True, cancel_futures=True)
+
+def search_issues_raw(jira, jql, fields):
+    """
+    Search issues and return all of them as a list of raw JSON dicts, using the async transport
+    when it is active and the local issue store when it is enabled.
+    Prefer iter_search_pages for searches that can return many issues.
+    """
+    if isinstance(jira, (SyncedJira, AsyncJiraTransport)):
+        # The transport fetches the remaining pages concurrently once the total is known
+        return jira.search(jql, fields)
+    return [issue for page in iter_search_pages(jira, jql, fields) for issue in page]
+
+def get_jira_json(jira, path, params=None):
+    """GET a Jira REST resource (path relative to /rest/api/2) with either backend and return its JSON."""
+    if isinstance(jira, SyncedJira):
+        jira = jira.jira
+    if isinstance(jira, AsyncJiraTransport):
+        return jira.get_json(path, params)
+    return json_loads(call_jira(jira._session.get, jira._get_url(path), params=params).content)
+
+def post_jira_json(jira, path, body):
+    """POST a JSON body to a Jira REST resource (path relative to /rest/api/2) with either backend and return its JSON."""
+    if isinstance(jira, SyncedJira):
+        jira = jira.jira
+    if isinstance(jira, AsyncJiraTransport):
+        return jira.post_json(path, body)
+    return json_loads(call_jira(jira._session.post, jira._get_url(path), data=json.dumps(body)).content)
+
+def format_jql_assignees(assignees):
+    """Format a list of assignee names as a JQL `assignee in (...)` clause."""
+    formatted_assignees = ', '.join([f'"{member}"' for member in assignees])
+    return f"assignee in ({formatted_assignees})"
+
+def create_jql_query(category, date_start, date_end, assignee=None, team_name=None, assignees=None):
     """
     Create JQL query based on task category and date range.
     date_start and date_end are expected to be *relative date strings* (e.g., "-21d")
     from the global variables.
+    If `assignees` (a list of names) is given, the query matches any of them instead of a single assignee.
     """
     category_info = TASK_CATEGORIES[category]
     
@@ -219,10 +810,13 @@ def create_jql_query(category, date_start, date_end, assignee=None, team_name=No
         else:
             query = category_info['query']
             
+        # Replace the date placeholders with the period dates
+        query = query.replace('{date_start}', date_start).replace('{date_end}', date_end)
+        
         # Replace the placeholder with the actual assignee.
-        # The date parts ({date_start}, {date_end}) are NOT in these JQLs, as per user's original query.
-        # The relative dates are hardcoded in the TASK_CATEGORIES JQL themselves.
-        if assignee:
+        if assignees:
+            query = query.replace('assignee = {assignee}', format_jql_assignees(assignees))
+        elif assignee:
             # Format the assignee name with proper escaping for JQL
             formatted_assignee = f'"{assignee}"'
             query = query.replace('{assignee}', formatted_assignee)
@@ -252,12 +846,39 @@ def create_jql_query(category, date_start, date_end, assignee=None, team_name=No
     
     query += f" AND updated >= '{date_start}' AND updated <= '{date_end}'"
     
-    if assignee:
+    if assignees:
+        query += f" AND {format_jql_assignees(assignees)}"
+    elif assignee:
         formatted_name = f'"{assignee}"'
         query += f" AND assignee = {formatted_name}"
     
     return query
 
+# Fields requested for task queries: customfield_10149 is Story Points,
+# statuscategorychangedate is used to assign tasks to report periods
+TASK_FIELDS = 'summary,status,assignee,customfield_10149,statuscategorychangedate'
+
+def build_task_record(issue, assignee, team_name):
+    """Convert a raw Jira issue dict into the task record stored in all_data, classifying its status for the team."""
+    fields = issue['fields']
+    status = fields['status']['name']
+    story_points = fields.get('customfield_10149', 0.0)
+    if story_points is None:
+        story_points = 0.0
+    
+    # Unmapped statuses are reported once per run by print_unmapped_status_summary
+    status_category = TEAM_STATUS_LOOKUPS.get(team_name, DEFAULT_STATUS_LOOKUP).get(status, "Other")
+    
+    return {
+        'Key': issue['key'],
+        'Summary': fields['summary'],
+        'Status': status,
+        'StatusCategory': status_category,
+        'Assignee': assignee,
+        'StoryPoints': story_points,
+        'StatusCategoryChangedDate': fields.get('statuscategorychangedate'),
+    }
+
 def get_tasks_for_period(jira, category, date_start_relative, date_end_relative, assignee, team_name):
     """
     Get tasks for a specific period, category, and team member,
@@ -273,264 +894,959 @@ def get_tasks_for_period(jira, category, date_start_relative, date_end_relative,
     # Pass the relative dates to create_jql_query, as the JQL itself uses relative dates.
     jql = create_jql_query(category, date_start_relative, date_end_relative, assignee, team_name)
     try:
-        print(f"Executing JQL for {team_name}, {assignee}: {jql}")
-        # Request customfield_10149 (Story Points)
-        issues = jira.search_issues(jql, maxResults=500, fields='summary,status,assignee,customfield_10149')
-        print(f"Found {len(issues)} issues for {assignee} in {team_name}")
-        
-        for issue in issues:
-            status = issue.fields.status.name
-            story_points = getattr(issue.fields, 'customfield_10149', 0.0)
-            if story_points is None:
-                story_points = 0.0
-            
-            # Get the status mapping for this team
-            status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
-            
-            if status in status_mapping['TO_DO']:
-                status_category = "To Do"
-            elif status in status_mapping['IN_DEV']:
-                status_category = "In Development"
-            elif status in status_mapping['COMPLETED']:
-                status_category = "Completed"
-            elif 'DECLINED' in status_mapping and status in status_mapping['DECLINED']:
-                status_category = "Declined"
-            elif 'CANCELLED' in status_mapping and status in status_mapping['CANCELLED']:
-                status_category = "Cancelled"
-            else:
-                status_category = "Other"
-                print(f"Warning: Status '{status}' for issue {issue.key} was not mapped to any category for team {team_name}")
-            
-            all_tasks.append({
-                'Key': issue.key,
-                'Summary': issue.fields.summary,
-                'Status': status,
-                'StatusCategory': status_category,
-                'Assignee': assignee,
-                'StoryPoints': story_points,
-            })
+        logger.debug(f"Executing JQL for {team_name}, {assignee}: {jql}", extra={'jql': jql})
+        # Request customfield_10149 (Story Points); all pages, processed as they arrive
+        issues_found = 0
+        for issues in iter_search_pages(jira, jql, TASK_FIELDS):
+            issues_found += len(issues)
+            for issue in issues:
+                all_tasks.append(build_task_record(issue, assignee, team_name))
+        logger.debug(f"Found {issues_found} issues for {assignee} in {team_name}")
+        RUN_STATS.count('task_issues', issues_found)
     except Exception as e:
-        print(f"Error in JQL query '{jql}': {e}")
-        print(f"JQL: {jql}")
+        logger.error(f"Error in JQL query '{jql}': {e}", extra={'jql': jql})
     
     return all_tasks
 
-def get_tracked_time_for_period(jira, date_start_relative, date_end_relative, team_members):
+def chunk_assignees(team_members, base_jql_length, max_jql_length=MAX_JQL_LENGTH):
     """
-    Fetches all worklogs within a given period and aggregates time spent by each team member.
-    Uses relative dates for the JQL query to fetch issues, and then filters in Python for robustness.
-    Includes detailed logging.
+    Split team_members into chunks so that `assignee in (...)` for each chunk,
+    added to a JQL of base_jql_length characters, stays under max_jql_length.
+    Every chunk holds at least one member.
     """
-    tracked_time_by_member = {member: 0.0 for member in team_members}
-
-    # Derive absolute dates from relative date strings for Python-side filtering
-    current_system_time = datetime.now()
-    def parse_relative_date_to_absolute(relative_str, base_date):
-        """Helper to parse relative date strings like '-7d' to absolute dates."""
-        if relative_str.startswith('-') and relative_str.endswith('d'):
-            days_offset = int(relative_str[1:-1])
-            return base_date - timedelta(days=days_offset) # Subtract for past dates
-        # Fallback for absolute dates if format is YYYY-MM-DD (though we expect relative here)
-        try:
-            return datetime.strptime(relative_str, "%Y-%m-%d")
-        except ValueError:
-            print(f"WARNING: Unexpected date format '{relative_str}'. Cannot parse to absolute date for internal filtering.")
-            return base_date # Return base date as a fallback if parsing fails
+    chunks = []
+    current_chunk = []
+    current_length = base_jql_length + len('assignee in ()')
+    for member in team_members:
+        member_length = len(member) + 4  # quotes plus ", " separator
+        if current_chunk and current_length + member_length > max_jql_length:
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_length = base_jql_length + len('assignee in ()')
+        current_chunk.append(member)
+        current_length += member_length
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def get_tasks_for_team_category(jira, category, date_start_relative, date_end_relative, team_members, team_name):
+    """
+    Batched version of get_tasks_for_period: fetch tasks of a category for all team members
+    with `assignee in (...)` queries and split them by assignee locally.
+    Returns a dict {member: [task, ...]} with an entry for every team member.
+    """
+    tasks_by_member = {member: [] for member in team_members}
+    
+    # Skip if this category doesn't apply to this team
+    if category not in TEAM_CATEGORIES.get(team_name, []):
+        return tasks_by_member
+    
+    # Jira returns display names; match them case-insensitively against the configured member names
+    member_lookup = {member.lower(): member for member in team_members}
     
-    start_date_obj_abs = parse_relative_date_to_absolute(date_start_relative, current_system_time).date()
-    end_date_obj_abs = parse_relative_date_to_absolute(date_end_relative, current_system_time).date()
+    base_jql_length = len(create_jql_query(category, date_start_relative, date_end_relative, team_name=team_name))
+    for assignee_chunk in chunk_assignees(team_members, base_jql_length):
+        jql = create_jql_query(category, date_start_relative, date_end_relative, team_name=team_name, assignees=assignee_chunk)
+        try:
+            logger.debug(f"Executing batched JQL for {team_name}, {len(assignee_chunk)} members: {jql}", extra={'jql': jql})
+            # A team-wide query can return many issues: stream them page by page
+            issues_found = 0
+            unmatched_issues = 0
+            for issues in iter_search_pages(jira, jql, TASK_FIELDS):
+                issues_found += len(issues)
+                for issue in issues:
+                    display_name = (issue['fields'].get('assignee') or {}).get('displayName') or ''
+                    member = member_lookup.get(display_name.lower())
+                    if member is None:
+                        unmatched_issues += 1
+                        logger.debug(f"Issue {issue['key']} assignee '{display_name}' does not match any member of {team_name}, skipping",
+                                     extra={'issue': issue['key']})
+                        continue
+                    tasks_by_member[member].append(build_task_record(issue, member, team_name))
+            logger.debug(f"Found {issues_found} issues for {len(assignee_chunk)} members in {team_name}")
+            RUN_STATS.count('task_issues', issues_found)
+            if unmatched_issues:
+                logger.warning(f"{unmatched_issues} {category} issues of {team_name} have an assignee that is not a team member, skipped")
+        except Exception as e:
+            logger.error(f"Error in JQL query '{jql}': {e}", extra={'jql': jql})
     
-    print(f"\n--- Fetching Worklogs for Tracked Time ---")
-    print(f"  System Time Used for Calculation: {current_system_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"  Report Period (relative for JQL): {date_start_relative} to {date_end_relative}")
-    print(f"  Report Period (absolute for internal Python checks): {start_date_obj_abs} to {end_date_obj_abs}")
+    return tasks_by_member
 
+def get_tracked_projects():
+    """Return the sorted list of Jira projects referenced by the category queries of all teams."""
     all_projects = set()
     for team_name_key in TEAMS.keys():
         for category in TEAM_CATEGORIES.get(team_name_key, []):
             category_info = TASK_CATEGORIES.get(category)
             if category_info:
-                import re
                 # Extract project names from both 'query' and 'ama_query' using regex
                 project_matches_query = re.findall(r'project\s*=\s*"([^"]+)"', category_info.get('query', ''))
                 project_matches_ama_query = re.findall(r'project\s*=\s*"([^"]+)"', category_info.get('ama_query', ''))
                 all_projects.update(project_matches_query)
                 all_projects.update(project_matches_ama_query)
-                
+    return sorted(all_projects)
+
+def create_worklog_jql(date_start_relative, date_end_relative, members):
+    """Create the JQL finding issues of the tracked projects with worklogs by members in the date range."""
+    all_projects = get_tracked_projects()
     project_jql_clause = ""
     if all_projects:
         project_jql_clause_content = " OR ".join([f'project = "{p}"' for p in all_projects])
         project_jql_clause = f"({project_jql_clause_content}) AND "
     else:
-        print("WARNING: No projects found in TASK_CATEGORIES to limit worklog search. Searching all projects (this might be slow and permission-heavy).")
+        logger.warning("No projects found in TASK_CATEGORIES to limit worklog search. Searching all projects (this might be slow and permission-heavy).")
         project_jql_clause = "project is not EMPTY AND " # Fallback if no specific projects extracted
 
+    jql = f"{project_jql_clause} worklogDate >= '{date_start_relative}' AND worklogDate <= '{date_end_relative}' "
+    if members:
+        assignee_list_for_jql = ', '.join([f'"{member}"' for member in members])
+        jql += f"AND worklogAuthor in ({assignee_list_for_jql})"
+    return jql
+
+def get_worklog_hours_by_day(jira, date_start_relative, date_end_relative, members):
+    """
+    Fetches all worklogs by the given members within a date range in one pass (chunked for long member lists).
+    Returns (hours_by_day, complete_from): a member x day table {member: {date: hours}} with an entry for
+    every member, and the first day whose worklogs are all in the table (None if a query failed).
+    Uses relative dates for the JQL query to fetch issues, and then filters in Python for robustness.
+    Includes detailed logging.
+    """
+    hours_by_day = {member: {} for member in members}
 
-    assignee_list_for_jql = ', '.join([f'"{member}"' for member in team_members])
+    # Derive absolute dates from relative date strings for Python-side filtering
+    current_system_time = datetime.now()
+    start_date_obj_abs = parse_relative_date(date_start_relative, current_system_time).date()
+    end_date_obj_abs = parse_relative_date(date_end_relative, current_system_time).date()
     
-    # Construct JQL using the provided relative dates for worklogDate
-    jql_broad_issues = (
-        f"{project_jql_clause} worklogDate >= '{date_start_relative}' AND worklogDate <= '{date_end_relative}' "
-        f"AND worklogAuthor in ({assignee_list_for_jql})"
-    )
+    logger.info(f"--- Fetching Worklogs for Tracked Time ---")
+    logger.debug(f"  System Time Used for Calculation: {current_system_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.debug(f"  Report Period (relative for JQL): {date_start_relative} to {date_end_relative}")
+    logger.info(f"  Report Period (absolute for internal Python checks): {start_date_obj_abs} to {end_date_obj_abs}")
+    logger.info(f"  Members: {len(members)}")
+
+    # Per-worklog decisions are traced at DEBUG level; INFO gets the totals
+    counted_worklogs = 0
+    skipped_worklogs = 0
+    failed_chunks = 0
+
+    # The author clause is a little longer than `assignee in ()`, which chunk_assignees accounts for
+    base_jql_length = len(create_worklog_jql(date_start_relative, date_end_relative, [])) + len('worklogAuthor in ()')
+    for member_chunk in chunk_assignees(members, base_jql_length):
+        jql_broad_issues = create_worklog_jql(date_start_relative, date_end_relative, member_chunk)
+        # An issue can be returned for several chunks; only count worklogs by this chunk's members
+        chunk_members = set(member_chunk)
+        logger.debug(f"Executing Broad JQL to find potential issues for worklogs: {jql_broad_issues}", extra={'jql': jql_broad_issues})
+        
+        try:
+            # Request the 'worklog' field to get worklog details; pages are processed as they arrive
+            issues_found = 0
+            for issues in iter_search_pages(jira, jql_broad_issues, 'summary,worklog'):
+                issues_found += len(issues)
+                for issue in issues:
+                    issue_key = issue['key']
+                    worklogs = (issue['fields'].get('worklog') or {}).get('worklogs')
+                    logger.debug(f"  Processing issue: {issue_key} - {issue['fields'].get('summary')}", extra={'issue': issue_key})
+                    if worklogs:
+                        logger.debug(f"    Issue {issue_key} has {len(worklogs)} worklog entries.", extra={'issue': issue_key})
+                        for worklog in worklogs:
+                            worklog_author_display_name = worklog['author']['displayName']
+                            worklog_started_str = worklog['started'] 
+                        
+                            try:
+                                # Extract just the date part from the 'started' timestamp (e.g., '2023-05-10T12:00:00.000+0000' -> '2023-05-10')
+                                worklog_date_obj = datetime.strptime(worklog_started_str.split('T')[0], "%Y-%m-%d").date()
+                            except ValueError:
+                                logger.warning(f"Could not parse worklog date '{worklog_started_str}' for issue {issue_key}. Skipping this worklog.")
+                                skipped_worklogs += 1
+                                continue 
+                        
+                            # Apply Python-side filtering to ensure worklogs fall strictly within the desired absolute date range
+                            # AND ensure the author is one of the members queried in this chunk
+                            if (start_date_obj_abs <= worklog_date_obj <= end_date_obj_abs) and \
+                               (worklog_author_display_name in chunk_members):
+                            
+                                timespent_seconds = worklog['timeSpentSeconds']
+                                timespent_hours = timespent_seconds / 3600.0
+                                member_hours = hours_by_day[worklog_author_display_name]
+                                member_hours[worklog_date_obj] = member_hours.get(worklog_date_obj, 0.0) + timespent_hours
+                                counted_worklogs += 1
+                                logger.debug(f"        ✅ Worklog PROCESSED: Issue={issue_key}, Author='{worklog_author_display_name}', Date='{worklog_date_obj}', TimeSpentSeconds={timespent_seconds}, Added {timespent_hours:.2f} hours.",
+                                             extra={'issue': issue_key, 'author': worklog_author_display_name, 'date': worklog_date_obj.isoformat(), 'seconds': timespent_seconds})
+                            else:
+                                skip_reason = []
+                                if not (start_date_obj_abs <= worklog_date_obj <= end_date_obj_abs):
+                                    skip_reason.append(f"date {worklog_date_obj} outside report period ({start_date_obj_abs} to {end_date_obj_abs})")
+                                if worklog_author_display_name not in chunk_members:
+                                    skip_reason.append(f"author '{worklog_author_display_name}' not in members list")
+                                skipped_worklogs += 1
+                                logger.debug(f"        ❌ Worklog SKIPPED: Issue={issue_key}, Author='{worklog_author_display_name}', Date='{worklog_date_obj}', TimeSpentSeconds={worklog['timeSpentSeconds']}. Reason: {'; '.join(skip_reason)}",
+                                             extra={'issue': issue_key, 'author': worklog_author_display_name, 'date': worklog_date_obj.isoformat(), 'seconds': worklog['timeSpentSeconds']})
+
+            logger.info(f"Found {issues_found} issues that might contain relevant worklogs by broad query.")
+            RUN_STATS.count('worklog_issues', issues_found)
+            if not issues_found:
+                logger.warning("No issues found by the broad query for worklogs. This might indicate a fundamental permission issue or no relevant activity in the period for these assignees.")
+
+        except Exception as e:
+            # Log the full traceback for deeper debugging
+            logger.exception(f"Failed to fetch worklogs with JQL '{jql_broad_issues}': {e}")
+            failed_chunks += 1
+    
+    logger.info(f"  {counted_worklogs} worklogs counted, {skipped_worklogs} skipped as outside the report period, by other authors or unparseable")
+    RUN_STATS.count('worklogs_counted', counted_worklogs)
+    RUN_STATS.count('worklogs_skipped', skipped_worklogs)
+    return hours_by_day, None if failed_chunks else start_date_obj_abs
+
+def sync_worklog_feed(jira, store, default_since):
+    """
+    Bring the stored worklogs up to date with Jira's bulk worklog feed:
+    ids of worklogs updated/deleted since the stored position, then the worklogs themselves
+    fetched with /worklog/list in batches. Returns the number of updated worklogs.
+    default_since is the feed position the report window needs; if the stored worklogs only cover a
+    later point, the feed is read again from default_since.
+    """
+    since = store.get_worklog_since()
+    covered_from = store.get_worklog_covered_from()
+    if since is None:
+        since = covered_from = default_since
+        logger.info(f"Worklog feed: first sync, starting from {datetime.fromtimestamp(since / 1000):%Y-%m-%d}")
+    elif covered_from is None or default_since < covered_from:
+        # The window starts before the stored worklogs: worklogs updated since then are read again
+        since = covered_from = default_since
+        logger.info(f"Worklog feed: report window starts before the stored worklogs, reading again from {datetime.fromtimestamp(since / 1000):%Y-%m-%d}")
+    
+    def read_feed(path):
+        """Return (worklog ids, feed position to continue from) of a paginated worklog feed."""
+        worklog_ids = []
+        position = since
+        while True:
+            page = get_jira_json(jira, path, params={'since': position})
+            worklog_ids.extend(entry['worklogId'] for entry in page.get('values', []))
+            position = page.get('until', position)
+            if page.get('lastPage', True):
+                return worklog_ids, position
+    
+    updated_ids, new_since = read_feed('worklog/updated')
+    deleted_ids, _ = read_feed('worklog/deleted')
     
-    print(f"Executing Broad JQL to find potential issues for worklogs: {jql_broad_issues}")
+    batches = [updated_ids[start:start + WORKLOG_LIST_BATCH_SIZE] for start in range(0, len(updated_ids), WORKLOG_LIST_BATCH_SIZE)]
+    batch_results = run_fetch_jobs({index: (post_jira_json, (jira, 'worklog/list', {'ids': batch}))
+                                    for index, batch in enumerate(batches)})
+    worklogs = [worklog for index in range(len(batches)) for worklog in batch_results[index]]
     
+    store.apply_worklog_changes(worklogs, deleted_ids, new_since, covered_from)
+    RUN_STATS.count('worklog_feed_updates', len(worklogs))
+    logger.info(f"Worklog feed: {len(worklogs)} updated and {len(deleted_ids)} deleted worklogs in {len(batches)} list requests")
+    return len(worklogs)
+
+def resolve_issue_projects(jira, store, issue_ids):
+    """Return {issue_id: (project_key, project_name)}, looking up issues not in the store with `id in (...)` searches."""
+    if isinstance(jira, SyncedJira):
+        # These lookups are cached in the store's issue_projects table, not as issue store views
+        jira = jira.jira
+    issue_projects = store.get_issue_projects(issue_ids)
+    missing_ids = [issue_id for issue_id in issue_ids if issue_id not in issue_projects]
+    if missing_ids:
+        chunk_size = 200
+        chunks = [missing_ids[start:start + chunk_size] for start in range(0, len(missing_ids), chunk_size)]
+        chunk_results = run_fetch_jobs({index: (search_issues_raw, (jira, f"id in ({', '.join(chunk)})", 'project'))
+                                        for index, chunk in enumerate(chunks)})
+        found_projects = {}
+        for index in range(len(chunks)):
+            for issue in chunk_results[index]:
+                project = issue['fields'].get('project') or {}
+                found_projects[str(issue['id'])] = (project.get('key'), project.get('name'))
+        store.set_issue_projects(found_projects)
+        issue_projects.update(found_projects)
+    return issue_projects
+
+def get_worklog_hours_by_day_from_feed(jira, date_start_relative, date_end_relative, members):
+    """
+    Same result as get_worklog_hours_by_day, built from the bulk worklog feed synced into the local store.
+    Only worklogs on issues of the tracked projects are counted. If Jira can't be reached, the stored
+    worklogs are used as they are and no day counts as complete. Otherwise the worklogs are complete
+    from WORKLOG_FEED_INITIAL_LOOKBACK_DAYS after the point the stored worklogs were first read from.
+    """
+    current_system_time = datetime.now()
+    start_date_obj_abs = parse_relative_date(date_start_relative, current_system_time).date()
+    end_date_obj_abs = parse_relative_date(date_end_relative, current_system_time).date()
+    logger.info("--- Fetching Worklogs for Tracked Time from the worklog feed ---")
+    logger.info(f"  Report Period (absolute for internal Python checks): {start_date_obj_abs} to {end_date_obj_abs}")
+    
+    store = IssueStore(ISSUE_STORE_PATH)
     try:
-        # Request the 'worklog' field to get worklog details
-        issues_to_check = jira.search_issues(jql_broad_issues, maxResults=False, fields='summary,worklog,assignee')
-        print(f"Found {len(issues_to_check)} issues that might contain relevant worklogs by broad query.")
-
-        if not issues_to_check:
-            print("  No issues found by the broad query for worklogs. This might indicate a fundamental permission issue or no relevant activity in the period for these assignees.")
-
-        for issue in issues_to_check:
-            print(f"  Processing issue: {issue.key} - {issue.fields.summary}") 
-            if hasattr(issue.fields, 'worklog') and hasattr(issue.fields.worklog, 'worklogs') and issue.fields.worklog.worklogs:
-                print(f"    Issue {issue.key} has {len(issue.fields.worklog.worklogs)} worklog entries.")
-                for worklog in issue.fields.worklog.worklogs:
-                    worklog_author_display_name = worklog.author.displayName
-                    worklog_started_str = worklog.started 
-                    
-                    try:
-                        # Extract just the date part from the 'started' timestamp (e.g., '2023-05-10T12:00:00.000+0000' -> '2023-05-10')
-                        worklog_date_obj = datetime.strptime(worklog_started_str.split('T')[0], "%Y-%m-%d").date()
-                    except ValueError:
-                        print(f"        WARNING: Could not parse worklog date '{worklog_started_str}' for issue {issue.key}. Skipping this worklog.")
-                        continue 
-                    
-                    # Apply Python-side filtering to ensure worklogs fall strictly within the desired absolute date range
-                    # AND ensure the author is one of the team members
-                    if (start_date_obj_abs <= worklog_date_obj <= end_date_obj_abs) and \
-                       (worklog_author_display_name in team_members):
-                        
-                        timespent_seconds = worklog.timeSpentSeconds
-                        timespent_hours = timespent_seconds / 3600.0
-                        tracked_time_by_member[worklog_author_display_name] += timespent_hours
-                        print(f"        ✅ Worklog PROCESSED: Issue={issue.key}, Author='{worklog_author_display_name}', Date='{worklog_date_obj}', TimeSpentSeconds={timespent_seconds}, Added {timespent_hours:.2f} hours. Current Total for '{worklog_author_display_name}': {tracked_time_by_member[worklog_author_display_name]:.2f}")
-                    else:
-                        skip_reason = []
-                        if not (start_date_obj_abs <= worklog_date_obj <= end_date_obj_abs):
-                            skip_reason.append(f"date {worklog_date_obj} outside report period ({start_date_obj_abs} to {end_date_obj_abs})")
-                        if worklog_author_display_name not in team_members:
-                            skip_reason.append(f"author '{worklog_author_display_name}' not in team members list")
-                        print(f"        ❌ Worklog SKIPPED: Issue={issue.key}, Author='{worklog_author_display_name}', Date='{worklog_date_obj}', TimeSpentSeconds={worklog.timeSpentSeconds}. Reason: {'; '.join(skip_reason)}")
+        default_since_date = datetime.combine(start_date_obj_abs, datetime.min.time()) - timedelta(days=WORKLOG_FEED_INITIAL_LOOKBACK_DAYS)
+        try:
+            sync_worklog_feed(jira, store, int(default_since_date.timestamp() * 1000))
+            covered_from = datetime.fromtimestamp(store.get_worklog_covered_from() / 1000)
+            complete_from = (covered_from + timedelta(days=WORKLOG_FEED_INITIAL_LOOKBACK_DAYS)).date()
+        except Exception as e:
+            if store.get_worklog_since() is None:
+                logger.exception(f"Failed to sync the worklog feed: {e}")
+                return {member: {} for member in members}, None
+            logger.warning(f"Could not sync the worklog feed ({e}). Using stored worklogs.")
+            complete_from = None
+        
+        worklog_rows = store.get_worklogs(start_date_obj_abs, end_date_obj_abs, members)
+        try:
+            issue_projects = resolve_issue_projects(jira, store, sorted({row[0] for row in worklog_rows}))
+        except Exception as e:
+            logger.warning(f"Could not look up the projects of worklog issues ({e}). Using stored projects.")
+            issue_projects = store.get_issue_projects({row[0] for row in worklog_rows})
+            complete_from = None
+    finally:
+        store.close()
+    
+    tracked_projects = set(get_tracked_projects())
+    hours_by_day = {member: {} for member in members}
+    skipped_worklogs = 0
+    for issue_id, author, started, seconds in worklog_rows:
+        # Projects in TASK_CATEGORIES may be given by key or by name
+        if not tracked_projects.intersection(issue_projects.get(issue_id, ())):
+            skipped_worklogs += 1
+            continue
+        worklog_date_obj = datetime.strptime(started.split('T')[0], "%Y-%m-%d").date()
+        member_hours = hours_by_day[author]
+        member_hours[worklog_date_obj] = member_hours.get(worklog_date_obj, 0.0) + seconds / 3600.0
+    logger.info(f"  {len(worklog_rows) - skipped_worklogs} worklogs counted, {skipped_worklogs} skipped as outside the tracked projects")
+    RUN_STATS.count('worklogs_counted', len(worklog_rows) - skipped_worklogs)
+    RUN_STATS.count('worklogs_skipped', skipped_worklogs)
+    return hours_by_day, complete_from
+
+def sum_tracked_time(hours_by_day, team_members, date_start_relative, date_end_relative):
+    """Sum the member x day hours table over a date range for each team member."""
+    current_system_time = datetime.now()
+    start_date_obj_abs = parse_relative_date(date_start_relative, current_system_time).date()
+    end_date_obj_abs = parse_relative_date(date_end_relative, current_system_time).date()
+    return {member: sum(hours for day, hours in hours_by_day.get(member, {}).items()
+                        if start_date_obj_abs <= day <= end_date_obj_abs)
+            for member in team_members}
 
-    except Exception as e:
-        print(f"ERROR: Failed to fetch worklogs with JQL '{jql_broad_issues}': {e}")
-        import traceback
-        traceback.print_exc() # Print full traceback for deeper debugging
+def get_tracked_time_for_period(jira, date_start_relative, date_end_relative, team_members):
+    """
+    Fetches all worklogs within a given period and aggregates time spent by each team member.
+    process_data uses one organization-wide get_worklog_hours_by_day pass instead.
+    """
+    hours_by_day, _ = get_worklog_hours_by_day(jira, date_start_relative, date_end_relative, team_members)
+    return sum_tracked_time(hours_by_day, team_members, date_start_relative, date_end_relative)
+
+def split_tasks_by_period(tasks_by_member, period_bounds):
+    """Assign each member's tasks to the period containing its status category change date."""
+    tasks_by_period = {period: {member: [] for member in tasks_by_member} for period in period_bounds}
+    for member, tasks in tasks_by_member.items():
+        for task in tasks:
+            period = find_period_for_date(parse_jira_datetime(task.get('StatusCategoryChangedDate')), period_bounds)
+            if period is not None:
+                tasks_by_period[period][member].append(task)
+    return tasks_by_period
+
+def fetch_category_tasks(jira, category, date_start_relative, date_end_relative, team_members, team_name):
+    """Fetch a category's tasks for a date range as {member: [task, ...]}, batched or per member."""
+    if USE_BATCHED_TASK_FETCH:
+        # One query for the whole team, split by assignee locally
+        return get_tasks_for_team_category(jira, category, date_start_relative, date_end_relative, team_members, team_name)
+    return {team_member: get_tasks_for_period(jira, category, date_start_relative, date_end_relative, team_member, team_name)
+            for team_member in team_members}
+
+def fetch_category_tasks_by_period(jira, category, team_members, team_name, report_periods=None):
+    """
+    Fetch a category's tasks for the given report periods (default: all, get_report_periods)
+    as {period: {member: [task, ...]}}.
+    """
+    if report_periods is None:
+        report_periods = get_report_periods()
+    if not report_periods:
+        return {}
+    if USE_COMBINED_WINDOW_FETCH:
+        # Query the whole span once and bucket tasks into the periods of every period set locally
+        base_date = datetime.now()
+        span_start, span_end = get_combined_window(report_periods, base_date)
+        tasks_by_member = fetch_category_tasks(jira, category, span_start, span_end, team_members, team_name)
+        tasks_by_period = {}
+        for periods in get_period_groups():
+            periods = {period: dates for period, dates in periods.items() if period in report_periods}
+            tasks_by_period.update(split_tasks_by_period(tasks_by_member, get_period_bounds(periods, base_date)))
+        return tasks_by_period
+    # One query per period; tasks are still filtered by period locally, since the issue store
+    # serves views without their upper date bound
+    period_bounds = get_period_bounds(report_periods, datetime.now())
+    return {period: split_tasks_by_period(fetch_category_tasks(jira, category, date_start, date_end, team_members, team_name),
+                                          {period: period_bounds[period]})[period]
+            for period, (date_start, date_end) in report_periods.items()}
+
+def print_unmapped_status_summary(unmapped_statuses):
+    """Log the Jira statuses that are not in a team's status mapping, with task counts and an example issue."""
+    if not unmapped_statuses:
+        return
+    lines = [f"{len(unmapped_statuses)} statuses were not mapped to any category (counted as 'Other'):",
+             f"  {'Team':<10} {'Status':<30} {'Tasks':>5}  Example"]
+    for (team_name, status), (task_count, example_key) in sorted(unmapped_statuses.items()):
+        lines.append(f"  {team_name:<10} {status:<30} {task_count:>5}  {example_key}")
+    logger.warning("\n".join(lines))
+
+def is_mock_team(team_name):
+    """True if the team's data comes from a mock data generator instead of Jira."""
+    return ((team_name == 'BA TEAM' and USE_MOCK_BA_DATA) or 
+            (team_name == 'AMA TEAM' and USE_MOCK_AMA_DATA) or 
+            (team_name in ['LDT TEAM', 'TWA TEAM', 'CWT TEAM'] and USE_MOCK_OTHER_DATA))
+
+def scale_members(members, scale):
+    """Repeat a member list scale times: the members themselves, then "Name 2", "Name 3", ..."""
+    return [member if copy == 1 else f"{member} {copy}" for copy in range(1, scale + 1) for member in members]
+
+def scale_mock_teams(scale):
+    """
+    Scale the members of the mocked teams in TEAMS for this run (see MOCK_MEMBER_SCALE), so that the
+    mock data generators and the report sheets list the synthetic members too. Called once by main().
+    """
+    if scale > 1:
+        for team_name, members in TEAMS.items():
+            if is_mock_team(team_name):
+                TEAMS[team_name] = scale_members(members, scale)
+
+def generate_synthetic_data(team_members, seed=None, tasks_per_member_category=None):
+    """
+    Generate seeded synthetic all_data entries for the teams in team_members {team: [member, ...]}, in the
+    shape process_data returns: status counts, task records and story points per category, member and period,
+    plus the tracked time of every member summed from random daily hours. Statuses are drawn from each
+    team's status mapping with MOCK_STATUS_WEIGHTS, with a small share of unmapped ones.
+    """
+    seed = MOCK_DATA_SEED if seed is None else seed
+    tasks_per_member_category = MOCK_TASKS_PER_MEMBER_CATEGORY if tasks_per_member_category is None else tasks_per_member_category
+    
+    base_date = datetime.now()
+    report_periods = get_report_periods()
+    period_bounds = get_period_bounds(report_periods, base_date)
+    window_start, window_end = get_combined_window(report_periods, base_date)
+    first_day = parse_relative_date(window_start, base_date).date()
+    days = [first_day + timedelta(days=offset) for offset in range((parse_relative_date(window_end, base_date).date() - first_day).days + 1)]
     
-    return tracked_time_by_member
+    synthetic_data = {}
+    for team_index, (team_name, members) in enumerate(team_members.items()):
+        rng = random.Random(f"{seed}:{team_name}")
+        status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
+        status_categories = team_status_categories(team_name)
+        # Jira statuses of each status category, by mapping key order (a status listed twice keeps its first category)
+        jira_statuses = {status_category: [status for status in status_mapping.get(mapping_key, [])
+                                           if TEAM_STATUS_LOOKUPS.get(team_name, DEFAULT_STATUS_LOOKUP).get(status) == status_category]
+                         for mapping_key, status_category in STATUS_CATEGORY_KEYS}
+        drawn_categories = [status_category for status_category in status_categories if jira_statuses[status_category]]
+        category_weights = [MOCK_STATUS_WEIGHTS.get(status_category, 1) for status_category in drawn_categories]
+        key_prefix = team_name.split()[0]
+        task_number = 0
+        team_task_count = 0
+        
+        # Member x day hours, summed per period like the worklog tables of live teams
+        hours_by_day = {member: {day: float(rng.randint(0, MOCK_MAX_HOURS_PER_DAY)) for day in days if day.weekday() < 5}
+                        for member in members}
+        team_data = {'aggregated_tracked_time': {
+            period: sum_tracked_time(hours_by_day, members, date_start, date_end)
+            for period, (date_start, date_end) in report_periods.items()
+        }}
+        
+        for category in TEAM_CATEGORIES.get(team_name, list(TASK_CATEGORIES.keys())):
+            category_data = {period: {} for period in report_periods}
+            category_data['tasks'] = {period: {} for period in report_periods}
+            category_data['story_points'] = {period: {} for period in report_periods}
+            for team_member in members:
+                for period, (period_start, period_end) in period_bounds.items():
+                    period_seconds = int((period_end - period_start).total_seconds())
+                    status_counts = dict.fromkeys(status_categories, 0)
+                    story_points = 0
+                    period_tasks = []
+                    for _ in range(rng.randint(0, 2 * tasks_per_member_category)):
+                        task_number += 1
+                        if rng.random() < MOCK_UNMAPPED_STATUS_SHARE:
+                            status, status_category = 'Waiting for QA', 'Other'
+                        else:
+                            status_category = rng.choices(drawn_categories, category_weights)[0]
+                            status = rng.choice(jira_statuses[status_category])
+                            status_counts[status_category] += 1
+                        task_story_points = rng.choice(MOCK_STORY_POINTS)
+                        story_points += task_story_points
+                        changed_at = period_start + timedelta(seconds=rng.randrange(max(1, period_seconds)))
+                        period_tasks.append({
+                            'Key': f"{key_prefix}-{team_index + 1}{task_number:06d}",
+                            'Summary': f"Synthetic {category} task {task_number}",
+                            'Status': status,
+                            'StatusCategory': status_category,
+                            'Assignee': team_member,
+                            'StoryPoints': task_story_points,
+                            'StatusCategoryChangedDate': changed_at.strftime("%Y-%m-%dT%H:%M:%S.000+0000"),
+                        })
+                    if period in SPRINT_PERIODS:
+                        team_task_count += len(period_tasks)
+                    category_data[period][team_member] = status_counts
+                    category_data['tasks'][period][team_member] = period_tasks
+                    category_data['story_points'][period][team_member] = story_points
+            team_data[category] = category_data
+        
+        synthetic_data[team_name] = team_data
+        RUN_STATS.count('tasks', team_task_count)
+    return synthetic_data
 
 def process_data(jira):
-    """Process all data for categories and teams"""
-    print("\n--- Entering process_data function ---") # Added print statement
+    """
+    Process all data for categories and teams.
+    Returns (all_data, worklog_hours_by_day), the latter being the member x day tracked hours table.
+    """
+    logger.debug("--- Entering process_data function ---")
     all_data = {}
     
     # Get BA TEAM mock data if enabled
     if USE_MOCK_BA_DATA:
-        print("Using mock data for BA TEAM")
+        logger.info("Using mock data for BA TEAM")
         ba_mock_data = generate_mock_ba_data()
         if ba_mock_data and 'BA TEAM' in ba_mock_data:
             all_data['BA TEAM'] = ba_mock_data['BA TEAM']
     
     # Get AMA TEAM mock data if enabled
     if USE_MOCK_AMA_DATA:
-        print("Using mock data for AMA TEAM")
+        logger.info("Using mock data for AMA TEAM")
         ama_mock_data = generate_mock_ama_data()
         if ama_mock_data and 'AMA TEAM' in ama_mock_data:
             all_data['AMA TEAM'] = ama_mock_data['AMA TEAM']
     
     # Get mock data for LDT, TWA, and CWT teams if enabled
     if USE_MOCK_OTHER_DATA:
-        print("Using mock data for LDT, TWA, and CWT teams")
+        logger.info("Using mock data for LDT, TWA, and CWT teams")
         other_mock_data = generate_mock_data()
         for team_name in ['LDT TEAM', 'TWA TEAM', 'CWT TEAM']:
             if team_name in other_mock_data:
                 all_data[team_name] = other_mock_data[team_name]
     
-    # Process data for each team separately
+    # Teams fetched live from Jira (skip teams if we're using mock data)
+    live_teams = {}
     for team_name, team_members in TEAMS.items():
-        # Skip teams if we're using mock data
-        if ((team_name == 'BA TEAM' and USE_MOCK_BA_DATA) or 
-            (team_name == 'AMA TEAM' and USE_MOCK_AMA_DATA) or 
-            (team_name in ['LDT TEAM', 'TWA TEAM', 'CWT TEAM'] and USE_MOCK_OTHER_DATA)):
-            print(f"Skipping live Jira data fetch for {team_name} due to mock data flag.")
+        if is_mock_team(team_name):
+            logger.debug(f"Skipping live Jira data fetch for {team_name} due to mock data flag.")
             continue
-            
+        live_teams[team_name] = team_members
+    
+    # Report periods and trend sprints; tasks in both are listed under each
+    report_periods = get_report_periods()
+    
+    # Closed periods already frozen in the KPI history are rebuilt from there; only the others are fetched
+    now = datetime.now()
+    closed_periods = {period: dates for period, dates in report_periods.items() if is_closed_period(*dates, now)}
+    history = None
+    frozen_periods = {}
+    if USE_HISTORY_STORE and live_teams and closed_periods:
+        history = KpiHistory(HISTORY_STORE_PATH)
+        frozen_periods = {period: dates for period, dates in closed_periods.items() if history.has_sprint(*dates, live_teams)}
+        if frozen_periods:
+            logger.info(f"{len(frozen_periods)} closed periods are read from the KPI history instead of Jira")
+    fetch_periods = {period: dates for period, dates in report_periods.items() if period not in frozen_periods}
+    
+    # Queue every Jira fetch up front and run them concurrently.
+    # Worklogs are fetched in one pass for all members of all live teams (people in two teams are
+    # fetched once) over the span of all periods; every team reads its tracked time from that table.
+    fetch_jobs = {}
+    all_members = list(dict.fromkeys(member for team_members in live_teams.values() for member in team_members))
+    if all_members and fetch_periods:
+        worklog_start, worklog_end = get_combined_window(fetch_periods, now)
+        get_worklog_hours = get_worklog_hours_by_day_from_feed if WORKLOG_FETCH_MODE == 'feed' else get_worklog_hours_by_day
+        fetch_jobs[('worklogs',)] = (RUN_STATS.timed_job('worklog_fetch', get_worklog_hours), (jira, worklog_start, worklog_end, all_members))
+    for team_name, team_members in live_teams.items():
+        if not fetch_periods:
+            break
+        for category in TEAM_CATEGORIES.get(team_name, list(TASK_CATEGORIES.keys())):
+            fetch_jobs[('tasks', team_name, category)] = (RUN_STATS.timed_job('task_fetch', fetch_category_tasks_by_period), (jira, category, team_members, team_name, fetch_periods))
+    
+    issue_store = None
+    if USE_ISSUE_STORE and fetch_jobs:
+        issue_store = IssueStore(ISSUE_STORE_PATH)
+        jira = SyncedJira(jira, issue_store)
+        with RUN_STATS.phase('issue_store_sync'):
+            jira.prepare()
+        fetch_jobs = {job_key: (func, (jira,) + args[1:]) for job_key, (func, args) in fetch_jobs.items()}
+    
+    logger.info(f"--- Running {len(fetch_jobs)} Jira fetch jobs with up to {JIRA_MAX_WORKERS} workers ---")
+    with RUN_STATS.phase('fetch'):
+        fetch_results = run_fetch_jobs(fetch_jobs)
+    
+    # Data served from a stale issue store is not frozen into the KPI history
+    fetched_fresh = True
+    if issue_store is not None:
+        fetched_fresh = not jira.offline and not jira.failed_views
+        jira.finish()
+        issue_store.close()
+    
+    # Member x day tracked hours shared by all team views, and the first day they are known to be complete from
+    worklog_hours_by_day, worklogs_complete_from = fetch_results.get(('worklogs',), ({}, None))
+    
+    # (team, Jira status) -> (number of tasks, example issue key) for statuses missing from the team's mapping
+    unmapped_statuses = {}
+    
+    # Process data for each team separately
+    for team_name, team_members in live_teams.items():
         team_data = {}
         
-        print(f"\n--- Calling get_tracked_time_for_period for {team_name} (Previous Sprint) ---")
-        team_tracked_time_prev = get_tracked_time_for_period(jira, PREV_SPRINT_START, PREV_SPRINT_END, team_members)
-        print(f"\n--- Calling get_tracked_time_for_period for {team_name} (Pre-Previous Sprint) ---")
-        team_tracked_time_pre_prev = get_tracked_time_for_period(jira, PRE_PREV_SPRINT_START, PRE_PREV_SPRINT_END, team_members)
-
+        # Frozen task records of the team, {period: {category: {member: [task, ...]}}}
+        frozen_tasks = {period: history.load_sprint_tasks(*dates, team_name) for period, dates in frozen_periods.items()}
+        
         # Store the aggregated tracked time directly at the team_data level
-        team_data['aggregated_tracked_time'] = {
-            'prev': team_tracked_time_prev,
-            'pre_prev': team_tracked_time_pre_prev
-        }
+        team_data['aggregated_tracked_time'] = {}
+        for period, (date_start, date_end) in report_periods.items():
+            if period in frozen_periods:
+                frozen_hours = history.load_sprint_hours(date_start, date_end, team_name)
+                team_data['aggregated_tracked_time'][period] = {member: frozen_hours.get(member, 0) for member in team_members}
+            else:
+                team_data['aggregated_tracked_time'][period] = sum_tracked_time(worklog_hours_by_day, team_members, date_start, date_end)
 
+        team_task_count = 0
         for category in TEAM_CATEGORIES.get(team_name, list(TASK_CATEGORIES.keys())):
-            print(f"Processing {category} for {team_name}...")
-            category_data = {
-                'prev': {},
-                'pre_prev': {},
-                'tasks': {'prev': {}, 'pre_prev': {}},
-                'story_points': {'prev': {}, 'pre_prev': {}}, 
-                # Removed 'tracked_time' from category_data as it's now aggregated at team_data level
-            }
+            logger.debug(f"Processing {category} for {team_name}...")
+            category_data = {period: {} for period in report_periods}
+            category_data['tasks'] = {period: {} for period in report_periods}
+            category_data['story_points'] = {period: {} for period in report_periods}
+            # Removed 'tracked_time' from category_data as it's now aggregated at team_data level
+            
+            # Previous and pre-previous sprint (and trend sprint) tasks, for counts and story points
+            tasks_by_period = dict(fetch_results.get(('tasks', team_name, category), {}))
+            for period in frozen_periods:
+                frozen_category_tasks = frozen_tasks[period].get(category, {})
+                tasks_by_period[period] = {team_member: frozen_category_tasks.get(team_member, []) for team_member in team_members}
+            
+            # Get the status categories for this team
+            status_categories = team_status_categories(team_name)
             
             for team_member in team_members:
-                # Get previous sprint tasks (for counts and story points)
-                # Use the hardcoded relative date strings for get_tasks_for_period
-                prev_tasks = get_tasks_for_period(jira, category, PREV_SPRINT_START, PREV_SPRINT_END, team_member, team_name)
-                
-                # Get pre-previous sprint tasks (for counts and story points)
-                # Use the hardcoded relative date strings for get_tasks_for_period
-                pre_prev_tasks = get_tasks_for_period(jira, category, PRE_PREV_SPRINT_START, PRE_PREV_SPRINT_END, team_member, team_name)
-                
-                # Get the status categories for this team
-                status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
-                status_categories = ['To Do', 'In Development', 'Completed']
-                
-                # Add special status categories if present in this team's mapping
-                if 'DECLINED' in status_mapping:
-                    status_categories.append('Declined')
-                if 'CANCELLED' in status_mapping:
-                    status_categories.append('Cancelled')
-                
-                # Count tasks by status for each period and team member
-                prev_counts = {status: sum(1 for t in prev_tasks if t['StatusCategory'] == status) for status in status_categories}
-                pre_prev_counts = {status: sum(1 for t in pre_prev_tasks if t['StatusCategory'] == status) for status in status_categories}
-                
-                # Calculate and store story points for each period and team member
-                prev_story_points = sum(t['StoryPoints'] for t in prev_tasks if 'StoryPoints' in t)
-                pre_prev_story_points = sum(t['StoryPoints'] for t in pre_prev_tasks if 'StoryPoints' in t)
-
-                # No longer need to assign tracked time here, it's handled at the team_data level
-                
-                category_data['prev'][team_member] = prev_counts
-                category_data['pre_prev'][team_member] = pre_prev_counts
-                category_data['tasks']['prev'][team_member] = prev_tasks
-                category_data['tasks']['pre_prev'][team_member] = pre_prev_tasks
-                category_data['story_points']['prev'][team_member] = prev_story_points 
-                category_data['story_points']['pre_prev'][team_member] = pre_prev_story_points 
+                for period in report_periods:
+                    period_tasks = tasks_by_period[period][team_member]
+                    # Trend sprints overlap the report periods; only report period tasks are counted in the run totals
+                    is_report_period = period in SPRINT_PERIODS
+                    # Count tasks by status and sum story points in one pass over the member's tasks
+                    status_counts = dict.fromkeys(status_categories, 0)
+                    story_points = 0
+                    for task in period_tasks:
+                        status_category = task['StatusCategory']
+                        if status_category in status_counts:
+                            status_counts[status_category] += 1
+                        elif status_category == 'Other' and is_report_period:
+                            unmapped_key = (team_name, task['Status'])
+                            unmapped_count, example_key = unmapped_statuses.get(unmapped_key, (0, task['Key']))
+                            unmapped_statuses[unmapped_key] = (unmapped_count + 1, example_key)
+                        story_points += task['StoryPoints']
+                    
+                    if is_report_period:
+                        team_task_count += len(period_tasks)
+                    category_data[period][team_member] = status_counts
+                    category_data['tasks'][period][team_member] = period_tasks
+                    category_data['story_points'][period][team_member] = story_points
                 
             team_data[category] = category_data
         
         all_data[team_name] = team_data
+        logger.info(f"{team_name}: {team_task_count} tasks in {len(team_data) - 1} categories")
+        RUN_STATS.count('tasks', team_task_count)
+    
+    print_unmapped_status_summary(unmapped_statuses)
+    RUN_STATS.count('unmapped_status_tasks', sum(task_count for task_count, _ in unmapped_statuses.values()))
+    
+    if history is not None:
+        # Freeze the periods that closed since the last run, if all their worklogs were read
+        periods_to_freeze = []
+        if fetched_fresh:
+            new_periods = [period for period in closed_periods if period not in frozen_periods]
+            periods_to_freeze = [period for period in new_periods if worklogs_complete_from is not None and
+                                 parse_relative_date(closed_periods[period][0], now).date() >= worklogs_complete_from]
+            if len(periods_to_freeze) < len(new_periods):
+                logger.info(f"{len(new_periods) - len(periods_to_freeze)} closed periods are not frozen: their worklogs may be incomplete")
+        for period in periods_to_freeze:
+            date_start, date_end = closed_periods[period]
+            for team_name in live_teams:
+                team_data = all_data[team_name]
+                categories = [category for category in team_data if category != 'aggregated_tracked_time']
+                history.save_sprint(date_start, date_end, team_name,
+                                    {category: team_data[category]['tasks'][period] for category in categories},
+                                    {category: team_data[category][period] for category in categories},
+                                    {category: team_data[category]['story_points'][period] for category in categories},
+                                    team_data['aggregated_tracked_time'][period])
+        if periods_to_freeze:
+            logger.info(f"Froze {len(periods_to_freeze)} closed periods in the KPI history ({HISTORY_STORE_PATH})")
+        RUN_STATS.count('history_periods_read', len(frozen_periods))
+        RUN_STATS.count('history_periods_frozen', len(periods_to_freeze))
+        history.close()
+    
+    return all_data, worklog_hours_by_day
+
+class KpiCube:
+    """
+    Dense rollup of all_data that the report sheets read their numbers from.
+    Task counts are held in one team x member x category x status x period array, story points
+    (team x member x category x period) and tracked hours (team x member x period) alongside.
+    Members are indexed per team in TEAMS order, so the member axis is as long as the largest team.
+    Totals are rolled up once when the cube is built; every lookup is a dict index plus an array read.
+    """
+    STATUSES = [status_category for _, status_category in STATUS_CATEGORY_KEYS]
+
+    def __init__(self, data):
+        import numpy as np
+        # Teams in report order (the order of all_data), followed by configured teams without data
+        self.teams = list(data) + [team_name for team_name in TEAMS if team_name not in data]
+        self.team_members = {team_name: TEAMS.get(team_name, []) for team_name in self.teams}
+        self.team_categories = {team_name: [category for category in data.get(team_name, {}) if category != 'aggregated_tracked_time']
+                                for team_name in self.teams}
+        categories = list(dict.fromkeys(category for team_name in self.teams for category in self.team_categories[team_name]))
+        periods = list(get_report_periods())
+        
+        self.team_index = {team_name: index for index, team_name in enumerate(self.teams)}
+        self.member_index = {team_name: {member: index for index, member in enumerate(members)}
+                             for team_name, members in self.team_members.items()}
+        self.category_index = {category: index for index, category in enumerate(categories)}
+        self.status_index = {status: index for index, status in enumerate(self.STATUSES)}
+        self.period_index = {period: index for index, period in enumerate(periods)}
+        
+        shape = (len(self.teams), max([len(members) for members in self.team_members.values()] + [1]),
+                 len(categories), len(self.STATUSES), len(periods))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.story_points = np.zeros(shape[:3] + shape[4:], dtype=np.float64)
+        self.hours = np.zeros(shape[:2] + shape[4:], dtype=np.float64)
+        # Statuses reported for each team; counts of other statuses don't add to the totals
+        self.team_status_mask = np.zeros((shape[0], shape[3]), dtype=bool)
+        
+        for team_name, team_data in data.items():
+            t = self.team_index[team_name]
+            members = self.member_index[team_name]
+            for status in team_status_categories(team_name):
+                self.team_status_mask[t, self.status_index[status]] = True
+            for category in self.team_categories[team_name]:
+                c = self.category_index[category]
+                category_data = team_data[category]
+                for period, p in self.period_index.items():
+                    for member, status_counts in category_data.get(period, {}).items():
+                        if member not in members:
+                            continue
+                        for status, count in status_counts.items():
+                            if status in self.status_index:
+                                self.counts[t, members[member], c, self.status_index[status], p] = count
+                    for member, story_points in category_data.get('story_points', {}).get(period, {}).items():
+                        if member in members:
+                            self.story_points[t, members[member], c, p] = story_points
+            for period, p in self.period_index.items():
+                for member, hours in team_data.get('aggregated_tracked_time', {}).get(period, {}).items():
+                    if member in members:
+                        self.hours[t, members[member], p] = hours
+        
+        # Rollups shared by the sheets
+        self.status_totals = self.counts.sum(axis=1)  # team x category x status x period
+        self.category_totals = (self.status_totals * self.team_status_mask[:, None, :, None]).sum(axis=2)  # team x category x period
+        self.member_totals = (self.counts * self.team_status_mask[:, None, None, :, None]).sum(axis=(2, 3))  # team x member x period
+        self.team_totals = self.member_totals.sum(axis=1)  # team x period
+        self.member_story_points = self.story_points.sum(axis=2)  # team x member x period
+        self.team_story_points = self.member_story_points.sum(axis=1)  # team x period
+        self.team_hours = self.hours.sum(axis=1)  # team x period
+    
+    def count(self, team_name, member, category, status, period='prev'):
+        """Number of a member's tasks of a category in a status category."""
+        if category not in self.category_index or status not in self.status_index:
+            return 0
+        return int(self.counts[self.team_index[team_name], self.member_index[team_name][member],
+                               self.category_index[category], self.status_index[status], self.period_index[period]])
+    
+    def status_total(self, team_name, category, status, period='prev'):
+        """Number of a team's tasks of a category in a status category."""
+        if team_name not in self.team_index or category not in self.category_index or status not in self.status_index:
+            return 0
+        return int(self.status_totals[self.team_index[team_name], self.category_index[category],
+                                      self.status_index[status], self.period_index[period]])
+    
+    def category_total(self, team_name, category, period='prev'):
+        """Number of a team's tasks of a category over the team's status categories."""
+        if team_name not in self.team_index or category not in self.category_index:
+            return 0
+        return int(self.category_totals[self.team_index[team_name], self.category_index[category], self.period_index[period]])
+    
+    def member_total(self, team_name, member, period='prev'):
+        """Number of a member's tasks over all categories and the team's status categories."""
+        return int(self.member_totals[self.team_index[team_name], self.member_index[team_name][member], self.period_index[period]])
+    
+    def team_total(self, team_name, period='prev'):
+        return int(self.team_totals[self.team_index[team_name], self.period_index[period]])
+    
+    def member_story_point_total(self, team_name, member, period='prev'):
+        """Story points of a member's tasks over all categories."""
+        return float(self.member_story_points[self.team_index[team_name], self.member_index[team_name][member], self.period_index[period]])
+    
+    def team_story_point_total(self, team_name, period='prev'):
+        return float(self.team_story_points[self.team_index[team_name], self.period_index[period]])
+    
+    def member_hours(self, team_name, member, period='prev'):
+        """Hours tracked by a member."""
+        return float(self.hours[self.team_index[team_name], self.member_index[team_name][member], self.period_index[period]])
     
-    return all_data
+    def team_hours_total(self, team_name, period='prev'):
+        return float(self.team_hours[self.team_index[team_name], self.period_index[period]])
+
+TASK_FRAME_COLUMNS = ['Team', 'Category', 'Period', 'Member', 'Key', 'Summary', 'Status', 'StatusCategory', 'StoryPoints',
+                      'StatusCategoryChangedDate']
+
+def build_task_frame(data):
+    """
+    Flatten the task records of all_data into one DataFrame (one row per team, category,
+    period and member a task is listed under), used for the cross-team pivots of the report
+    and exported as the task records of the dataset.
+    """
+    rows = [
+        (team_name, category, period, team_member, task['Key'], task['Summary'], task['Status'], task['StatusCategory'],
+         task['StoryPoints'], task.get('StatusCategoryChangedDate'))
+        for team_name, team_data in data.items()
+        for category, category_data in team_data.items() if category != 'aggregated_tracked_time'
+        for period, tasks_by_member in category_data.get('tasks', {}).items()
+        for team_member, tasks in tasks_by_member.items()
+        for task in tasks
+    ]
+    import pandas as pd
+    return pd.DataFrame.from_records(rows, columns=TASK_FRAME_COLUMNS)
+
+def build_worklog_frame(worklog_hours_by_day):
+    """The member x day tracked hours table as a DataFrame with a row per member and day."""
+    rows = [(member, day, hours)
+            for member, hours_by_day in worklog_hours_by_day.items()
+            for day, hours in sorted(hours_by_day.items())]
+    import pandas as pd
+    return pd.DataFrame.from_records(rows, columns=['Member', 'Date', 'Hours'])
+
+def build_member_kpi_frame(cube):
+    """Tasks, story points and tracked hours per team, member and period, from the KpiCube rollups."""
+    rows = [(team_name, member, period, int(cube.member_totals[t, m, p]),
+             float(cube.member_story_points[t, m, p]), float(cube.hours[t, m, p]))
+            for team_name, t in cube.team_index.items()
+            for member, m in cube.member_index[team_name].items()
+            for period, p in cube.period_index.items()]
+    import pandas as pd
+    return pd.DataFrame.from_records(rows, columns=['Team', 'Member', 'Period', 'Tasks', 'StoryPoints', 'Hours'])
+
+def build_status_count_frame(cube):
+    """Non-zero task counts per team, member, category, status category and period, from the KpiCube."""
+    import numpy as np
+    import pandas as pd
+    categories = list(cube.category_index)
+    team_indexes, member_indexes, category_indexes, status_indexes, period_indexes = np.nonzero(cube.counts)
+    periods = list(cube.period_index)
+    rows = [(cube.teams[t], cube.team_members[cube.teams[t]][m], categories[c], cube.STATUSES[s], periods[p], int(cube.counts[t, m, c, s, p]))
+            for t, m, c, s, p in zip(team_indexes, member_indexes, category_indexes, status_indexes, period_indexes)]
+    return pd.DataFrame.from_records(rows, columns=['Team', 'Member', 'Category', 'StatusCategory', 'Period', 'Tasks'])
+
+def parquet_engine_available():
+    """True if pandas can write Parquet files (pyarrow or fastparquet is installed)."""
+    return any(importlib.util.find_spec(module) is not None for module in ('pyarrow', 'fastparquet'))
+
+# Dataset file formats: format -> (file extension, writer(frame, path))
+EXPORT_WRITERS = {
+    'parquet': ('parquet', lambda frame, path: frame.to_parquet(path, compression=PARQUET_COMPRESSION, index=False)),
+    'csv': ('csv', lambda frame, path: frame.to_csv(path, index=False)),
+    'jsonl': ('jsonl', lambda frame, path: frame.to_json(path, orient='records', lines=True, force_ascii=False, date_format='iso')),
+}
+
+def export_dataset(export_formats, task_frame, worklog_hours_by_day, cube):
+    """Write the report's dataset next to the workbook in each of the given formats; returns the written paths."""
+    frames = {
+        'tasks': task_frame,
+        'worklog_hours': build_worklog_frame(worklog_hours_by_day),
+        'member_kpis': build_member_kpi_frame(cube),
+        'status_counts': build_status_count_frame(cube),
+    }
+    paths = []
+    for export_format in export_formats:
+        extension, write_frame = EXPORT_WRITERS[export_format]
+        for name, frame in frames.items():
+            path = get_run_file_path(f'.{name}.{extension}')
+            write_frame(frame, path)
+            paths.append(path)
+    logger.info(f"Dataset exported as {', '.join(export_formats)}: {len(paths)} files next to {OUTPUT_PATH}")
+    return paths
+
+# Named cell styles of the report. They are registered once per workbook (register_report_styles)
+# and applied by name, so the summary tables share one look and openpyxl doesn't have to
+# deduplicate a new set of style objects for every cell.
+STYLE_TABLE_TITLE = 'KPI Table Title'
+STYLE_TEAM_TITLE = 'KPI Team Title'
+STYLE_HEADER = 'KPI Header'
+STYLE_TEAM_HEADER = 'KPI Team Header'
+STYLE_TABLE_HEADER = 'KPI Table Header'
+STYLE_DETAILS_HEADER = 'KPI Details Header'
+STYLE_CATEGORY = 'KPI Category'
+STYLE_CATEGORY_BAND = 'KPI Category Band'
+STYLE_SHEET_CATEGORY = 'KPI Sheet Category'
+STYLE_MEMBER = 'KPI Member'
+STYLE_STATUS_NAME = 'KPI Status Name'
+STYLE_STATUS_NAME_DECLINED = 'KPI Status Name Declined'
+STYLE_STATUS_LABEL = 'KPI Status Label'
+STYLE_STATUS_LABEL_ALT = 'KPI Status Label Alternate'
+STYLE_STATUS_LABEL_DECLINED = 'KPI Status Label Declined'
+STYLE_COUNT = 'KPI Count'
+STYLE_COUNT_ALT = 'KPI Count Alternate'
+STYLE_COUNT_DECLINED = 'KPI Count Declined'
+STYLE_STATUS_TOTAL = 'KPI Status Total'
+STYLE_STATUS_TOTAL_DECLINED = 'KPI Status Total Declined'
+STYLE_TOTAL_LABEL = 'KPI Total Label'
+STYLE_TOTAL = 'KPI Total'
+STYLE_GRAND_TOTAL = 'KPI Grand Total'
+STYLE_GRAND_TOTAL_LABEL = 'KPI Grand Total Label'
+
+def report_styles():
+    """The named report styles as {name: NamedStyle arguments}."""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    def solid_fill(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    medium_border = Border(left=Side(style='medium'), right=Side(style='medium'), top=Side(style='medium'), bottom=Side(style='medium'))
+    center_align = Alignment(horizontal='center', vertical='center')
+    left_align = Alignment(horizontal='left', vertical='center')
+    indent_align = Alignment(horizontal='left', vertical='center', indent=2)
+
+    header_fill = solid_fill("DDEBF7")
+    category_fill = solid_fill("EBF1DE")
+    alternating_fill = solid_fill("F5F5F5")
+    totals_fill = solid_fill("FFE699")
+    team_fill = solid_fill("BDD7EE")
+    declined_fill = solid_fill("FFC7CE")  # Declined and Cancelled
+
+    return {
+        STYLE_TABLE_TITLE: dict(font=Font(bold=True, size=12)),
+        STYLE_TEAM_TITLE: dict(font=Font(bold=True, size=14), fill=team_fill, border=thin_border, alignment=center_align),
+        STYLE_HEADER: dict(font=Font(bold=True, size=11), fill=header_fill, border=thin_border, alignment=center_align),
+        STYLE_TEAM_HEADER: dict(font=Font(bold=True, size=12), fill=header_fill, border=thin_border, alignment=center_align),
+        STYLE_TABLE_HEADER: dict(font=Font(bold=True), fill=header_fill, border=thin_border, alignment=center_align),
+        STYLE_DETAILS_HEADER: dict(font=Font(bold=True), fill=header_fill, alignment=Alignment(horizontal='center')),
+        STYLE_CATEGORY: dict(font=Font(bold=True, size=11), fill=category_fill, border=thin_border, alignment=left_align),
+        STYLE_CATEGORY_BAND: dict(font=Font(bold=True), fill=category_fill, border=medium_border, alignment=left_align),
+        STYLE_SHEET_CATEGORY: dict(font=Font(bold=True), fill=category_fill),
+        STYLE_MEMBER: dict(font=Font(bold=True)),
+        STYLE_STATUS_NAME: dict(font=Font(italic=True)),
+        STYLE_STATUS_NAME_DECLINED: dict(font=Font(italic=True), fill=declined_fill),
+        STYLE_STATUS_LABEL: dict(font=Font(size=11), border=thin_border, alignment=indent_align),
+        STYLE_STATUS_LABEL_ALT: dict(font=Font(size=11), fill=alternating_fill, border=thin_border, alignment=indent_align),
+        STYLE_STATUS_LABEL_DECLINED: dict(font=Font(size=11), fill=declined_fill, border=thin_border, alignment=indent_align),
+        STYLE_COUNT: dict(font=Font(size=11), border=thin_border, alignment=center_align),
+        STYLE_COUNT_ALT: dict(font=Font(size=11), fill=alternating_fill, border=thin_border, alignment=center_align),
+        STYLE_COUNT_DECLINED: dict(font=Font(size=11), fill=declined_fill, border=thin_border, alignment=center_align),
+        STYLE_STATUS_TOTAL: dict(font=Font(bold=True, size=11, color="444444"), fill=totals_fill, border=thin_border, alignment=center_align),
+        STYLE_STATUS_TOTAL_DECLINED: dict(font=Font(bold=True, size=11, color="444444"), fill=declined_fill, border=thin_border, alignment=center_align),
+        STYLE_TOTAL_LABEL: dict(font=Font(bold=True, size=11), fill=header_fill, border=thin_border),
+        STYLE_TOTAL: dict(font=Font(bold=True, size=11), fill=header_fill, border=thin_border, alignment=center_align),
+        STYLE_GRAND_TOTAL: dict(font=Font(bold=True), fill=totals_fill, border=thin_border, alignment=center_align),
+        STYLE_GRAND_TOTAL_LABEL: dict(font=Font(bold=True), fill=totals_fill),
+    }
+
+def register_report_styles(wb):
+    """Register the named report styles with a workbook; call once before writing any cells."""
+    from openpyxl.styles import NamedStyle
+    for name, style in report_styles().items():
+        wb.add_named_style(NamedStyle(name=name, **style))
 
 def safe_set_cell_value(sheet, row, column, value):
     """Safely set cell value, handling merged cells properly"""
     # Get the cell
+    from openpyxl.cell.cell import MergedCell
     cell = sheet.cell(row=row, column=column)
     
     # Check if it's a merged cell
-    if isinstance(cell, openpyxl.cell.cell.MergedCell):
+    if isinstance(cell, MergedCell):
         # Find the merge range that contains this cell
         for merge_range in sheet.merged_cells.ranges:
             min_row, min_col, max_row, max_col = merge_range.min_row, merge_range.min_col, merge_range.max_row, merge_range.max_col
@@ -540,28 +1856,18 @@ def safe_set_cell_value(sheet, row, column, value):
                 return
         
         # If we can't find the merge range, log a warning
-        print(f"Warning: Cell at row {row}, column {column} is a merged cell but no merge range was found")
+        logger.warning(f"Cell at row {row}, column {column} is a merged cell but no merge range was found")
     else:
         # Set value directly for a normal cell
         cell.value = value
 
 
-def create_consolidated_summary(wb, data):
-    """Create a consolidated summary sheet that shows all teams together"""
+def create_consolidated_summary(wb, cube):
+    """Create a consolidated summary sheet that shows all teams together, from the KpiCube rollups"""
     # This sheet is created by main() now, so just get it
     summary_sheet = wb["All Teams Summary"] 
 
     headers = ["Category", "Status"] + list(TEAMS.keys()) + ["Total"]
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-    category_fill = PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid")
-    total_fill = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
-    border_thick = Border(left=Side(style='medium'), right=Side(style='medium'),
-                          top=Side(style='medium'), bottom=Side(style='medium'))
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-    center_align = Alignment(horizontal='center', vertical='center')
-    left_align = Alignment(horizontal='left', vertical='center')
 
     # Find the starting row for the consolidated summary table.
     # It should be placed after the main summary content on the "Summary" sheet.
@@ -571,47 +1877,32 @@ def create_consolidated_summary(wb, data):
     current_row_on_summary = summary_sheet_main.max_row + 3 # Add some space
 
     # Write a title for the consolidated summary table
-    summary_sheet_main.cell(row=current_row_on_summary, column=1, value="Consolidated Status Table by Team").font = Font(bold=True, size=12)
+    summary_sheet_main.cell(row=current_row_on_summary, column=1, value="Consolidated Status Table by Team").style = STYLE_TABLE_TITLE
     current_row_on_summary += 2 # Add more space before the table headers
 
 
     for col, header in enumerate(headers, 1):
-        cell = summary_sheet.cell(row=1, column=col, value=header) # This is for "All Teams Summary" sheet
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_align
-        cell.border = thin_border
+        summary_sheet.cell(row=1, column=col, value=header).style = STYLE_TABLE_HEADER # This is for "All Teams Summary" sheet
 
-    all_categories = sorted({cat for team_data in data.values() for cat in team_data.keys() if cat != 'aggregated_tracked_time'}) # Exclude the new key
+    all_categories = sorted(cube.category_index)
     all_statuses = {"To Do", "In Development", "Completed", "Declined", "Cancelled"}
 
     row = 2
     for category in all_categories:
         summary_sheet.merge_cells(start_row=row, start_column=1, end_row=row, end_column=len(headers))
         for col in range(1, len(headers) + 1):
-            cell = summary_sheet.cell(row=row, column=col)
-            cell.fill = category_fill
-            cell.border = border_thick
-            cell.alignment = left_align if col == 1 else center_align
+            summary_sheet.cell(row=row, column=col).style = STYLE_CATEGORY_BAND
         summary_sheet.cell(row=row, column=1).value = category
-        summary_sheet.cell(row=row, column=1).font = Font(bold=True)
         row += 1
 
         for status in sorted(all_statuses):
             status_total = 0
             for col in range(1, len(headers) + 1):
-                cell = summary_sheet.cell(row=row, column=col)
-                cell.border = thin_border
-                cell.alignment = center_align
+                summary_sheet.cell(row=row, column=col).style = STYLE_COUNT
 
             summary_sheet.cell(row=row, column=2, value=status)
             for team_idx, team in enumerate(TEAMS.keys()):
-                team_total = 0
-                if category in data.get(team, {}): # Check if category exists in team_data
-                    for member in TEAMS[team]:
-                        # Access prev counts from the original data structure
-                        count = data[team][category]['prev'].get(member, {}).get(status, 0)
-                        team_total += count
+                team_total = cube.status_total(team, category, status)
                 col = team_idx + 3
                 if team_total > 0:
                     summary_sheet.cell(row=row, column=col, value=team_total)
@@ -622,52 +1913,153 @@ def create_consolidated_summary(wb, data):
 
     # Add TOTAL row at the bottom
     total_row = summary_sheet.max_row + 1
-    summary_sheet.cell(row=total_row, column=1, value="TOTAL").font = Font(bold=True)
-    summary_sheet.cell(row=total_row, column=1).fill = total_fill
-    summary_sheet.cell(row=total_row, column=1).border = thin_border
-    summary_sheet.cell(row=total_row, column=1).alignment = center_align
+    summary_sheet.cell(row=total_row, column=1, value="TOTAL").style = STYLE_GRAND_TOTAL
 
 
-def create_xlsx_report(data, wb): 
-    """Create Excel report from the data"""
+def add_team_pie_charts(wb, data, cube):
+    """
+    Add a pie chart per team to the 'Summary' sheet showing how the team's tasks split over
+    the task categories. The chart data is written to a hidden 'ChartData' sheet.
+    """
+    from openpyxl.chart import PieChart, Reference
+    from openpyxl.chart.label import DataLabelList
+    summary_sheet = wb["Summary"]
+    data_sheet = wb.create_sheet("ChartData")
+    data_sheet.sheet_state = "hidden"
+
+    chart_anchor = 5
+    chart_spacing = 18
+    row_cursor = 1
+
+    for team_name in data:
+        # Categories without tasks would only add empty slices
+        category_totals = [(category, cube.category_total(team_name, category))
+                           for category in cube.team_categories[team_name]]
+        category_totals = [(category, total) for category, total in category_totals if total > 0]
+        if not category_totals:
+            continue
+
+        start_row = row_cursor
+        for category, total in category_totals:
+            data_sheet.cell(row=row_cursor, column=1, value=category)
+            data_sheet.cell(row=row_cursor, column=2, value=total)
+            row_cursor += 1
+        end_row = row_cursor - 1
+
+        label_ref = Reference(data_sheet, min_col=1, min_row=start_row, max_row=end_row)
+        data_ref = Reference(data_sheet, min_col=2, min_row=start_row, max_row=end_row)
+
+        chart = PieChart()
+        chart.add_data(data_ref, titles_from_data=False)
+        chart.set_categories(label_ref)
+        chart.title = f"{team_name} Task Contribution"
+        chart.dataLabels = DataLabelList()
+        chart.dataLabels.showPercent = True
+        chart.dataLabels.showCatName = False
+        chart.dataLabels.showVal = False
+        chart.dataLabels.showLeaderLines = False
+        chart.dataLabels.showLegendKey = False
+
+        summary_sheet.add_chart(chart, f"Y{chart_anchor}")
+        chart_anchor += chart_spacing
+
+
+# Metrics of the trend tables: (title, member value, team value) read from the KpiCube for a period
+TREND_METRICS = [
+    ("Tasks", KpiCube.member_total, KpiCube.team_total),
+    ("Story Points", KpiCube.member_story_point_total, KpiCube.team_story_point_total),
+    ("Tracked Time", lambda cube, team_name, member, period: round(cube.member_hours(team_name, member, period), 2),
+     lambda cube, team_name, period: round(cube.team_hours_total(team_name, period), 2)),
+]
+
+def create_trend_sheet(wb, data, cube):
+    """
+    Create the 'Trends' sheet: for every team a table per metric (tasks, story points, tracked time)
+    with a row per member, a TOTAL row and a column per trend sprint, each charted as a line chart
+    next to the table (members as lines, or only the team total for teams over TREND_CHART_MAX_MEMBERS).
+    """
+    from openpyxl.chart import LineChart, Reference
+    from openpyxl.utils import get_column_letter
+    sheet = wb.create_sheet("Trends")
+    periods = list(TREND_PERIODS)
+    total_cols = len(periods) + 1
+    chart_column = get_column_letter(total_cols + 2)
+    chart_rows = 16  # rows a chart covers; shorter tables are padded so charts don't overlap
+
+    sheet.column_dimensions['A'].width = 25
+    for col_idx in range(2, total_cols + 1):
+        sheet.column_dimensions[get_column_letter(col_idx)].width = 15
+
+    row = 1
+    for team_name in data:
+        team_members = cube.team_members[team_name]
+        sheet.cell(row=row, column=1, value=team_name)
+        sheet.merge_cells(start_row=row, start_column=1, end_row=row, end_column=total_cols)
+        for col in range(1, total_cols + 1):
+            sheet.cell(row=row, column=col).style = STYLE_TEAM_TITLE
+        row += 2
+
+        for metric, member_value, team_value in TREND_METRICS:
+            header_row = row
+            sheet.cell(row=row, column=1, value=metric).style = STYLE_HEADER
+            for col_idx, period in enumerate(periods, 2):
+                sheet.cell(row=row, column=col_idx, value=trend_period_label(period)).style = STYLE_HEADER
+            row += 1
+
+            first_member_row = row
+            for member_idx, member in enumerate(team_members):
+                label_style, value_style = (STYLE_STATUS_LABEL_ALT, STYLE_COUNT_ALT) if member_idx % 2 == 1 else (STYLE_STATUS_LABEL, STYLE_COUNT)
+                sheet.cell(row=row, column=1, value=member).style = label_style
+                for col_idx, period in enumerate(periods, 2):
+                    sheet.cell(row=row, column=col_idx, value=member_value(cube, team_name, member, period)).style = value_style
+                row += 1
+
+            total_row = row
+            sheet.cell(row=row, column=1, value="TOTAL").style = STYLE_TOTAL_LABEL
+            for col_idx, period in enumerate(periods, 2):
+                sheet.cell(row=row, column=col_idx, value=team_value(cube, team_name, period)).style = STYLE_TOTAL
+            row += 1
+
+            chart = LineChart()
+            chart.title = f"{team_name}: {metric}"
+            chart.y_axis.title = metric
+            chart.height = 7.5
+            chart.width = 18
+            if len(team_members) <= TREND_CHART_MAX_MEMBERS:
+                series_rows = (first_member_row, total_row - 1)
+            else:
+                series_rows = (total_row, total_row)
+            if series_rows[0] <= series_rows[1]:
+                chart.add_data(Reference(sheet, min_col=1, max_col=total_cols, min_row=series_rows[0], max_row=series_rows[1]),
+                               from_rows=True, titles_from_data=True)
+                chart.set_categories(Reference(sheet, min_col=2, max_col=total_cols, min_row=header_row, max_row=header_row))
+                sheet.add_chart(chart, f"{chart_column}{header_row}")
+
+            row = max(row, header_row + chart_rows) + 1
+            # Finished tables can be written out
+            wb.flush(sheet, row)
+        row += 1
+
+def create_xlsx_report(data, wb, cube=None, task_frame=None): 
+    """
+    Create Excel report from the data; the numbers are read from its KpiCube and the
+    cross-team pivots from its task frame (both built here if not given)
+    """
+    from openpyxl.utils import get_column_letter
+    if cube is None:
+        cube = KpiCube(data)
+    if task_frame is None:
+        task_frame = build_task_frame(data)
     try:
         # Always get the "Summary" sheet by name
         sheet = wb["Summary"]
         
-        # Define cell styles
-        header_font = Font(bold=True, size=12)
-        subheader_font = Font(bold=True, size=11, color="444444")
-        normal_font = Font(size=11)
-        bold_font = Font(bold=True, size=11)
-        
-        center_align = Alignment(horizontal='center', vertical='center')
-        left_align = Alignment(horizontal='left', vertical='center')
-        indent_align = Alignment(horizontal='left', vertical='center', indent=2)
-        
-        thin_border = Border(
-            left=Side(style='thin'), 
-            right=Side(style='thin'), 
-            top=Side(style='thin'), 
-            bottom=Side(style='thin')
-        )
-        
-        header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-        category_fill = PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid")
-        status_fill = PatternFill(start_color="F8CBAD", end_color="F8CBAD", fill_type="solid")
-        alternating_fill = PatternFill(start_color="F5F5F5", end_color="F5F5F5", fill_type="solid")
-        totals_fill = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
-        team_fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
-        declined_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        cancelled_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        
         row = 1
         
         # Process each team separately
-        for team_name, team_data in data.items():
+        for team_name in data:
             # Add team header
-            team_cell = sheet.cell(row=row, column=1, value=team_name)
-            team_cell.font = Font(bold=True, size=14)
-            team_cell.fill = team_fill
+            sheet.cell(row=row, column=1, value=team_name)
             
             # Determine number of columns needed for this team
             team_members = TEAMS[team_name]
@@ -679,9 +2071,7 @@ def create_xlsx_report(data, wb):
             
             # Style the team header
             for col in range(1, total_cols + 1):
-                cell = sheet.cell(row=row, column=col)
-                cell.border = thin_border
-                cell.alignment = center_align
+                sheet.cell(row=row, column=col).style = STYLE_TEAM_TITLE
             
             row += 1
             
@@ -699,164 +2089,81 @@ def create_xlsx_report(data, wb):
             
             # Apply styling to headers
             for col in range(1, total_cols + 1):
-                cell = sheet.cell(row=row, column=col)
-                cell.font = header_font
-                cell.alignment = center_align
-                cell.fill = header_fill
-                cell.border = thin_border
+                sheet.cell(row=row, column=col).style = STYLE_TEAM_HEADER
             
             row += 1
             
             # Get the status categories for this team
-            status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
-            status_categories = ['To Do', 'In Development', 'Completed']
-            if 'DECLINED' in status_mapping:
-                status_categories.append('Declined')
-            if 'CANCELLED' in status_mapping:
-                    status_categories.append('Cancelled')
+            status_categories = team_status_categories(team_name)
             
-            # Filter out 'aggregated_tracked_time' when iterating through categories for display
-            display_categories = [cat for cat in team_data.keys() if cat != 'aggregated_tracked_time']
+            # Task categories of this team, in display order
+            display_categories = cube.team_categories[team_name]
 
             # Fill in task categories and their counts
             for category_idx, category in enumerate(display_categories):
-                category_data = team_data[category] # Get the actual category data
                 # Add a row for the category name
-                category_cell = sheet.cell(row=row, column=1, value=category)
-                category_cell.font = bold_font
-                category_cell.fill = category_fill
+                sheet.cell(row=row, column=1, value=category)
                     
                 # Merge cells across all columns for category header
                 sheet.merge_cells(start_row=row, start_column=1, end_row=row, end_column=total_cols)
                     
                 # Style category row
                 for col in range(1, total_cols + 1):
-                    cell = sheet.cell(row=row, column=col)
-                    cell.border = thin_border
-                    if col == 1:
-                        cell.alignment = left_align
+                    sheet.cell(row=row, column=col).style = STYLE_CATEGORY
                         
                 row += 1
                 
                 # Add a row for each status 
                 for status_idx, status in enumerate(status_categories):
-                    # Add the status name with indentation
-                    status_cell = sheet.cell(row=row, column=1, value=f"{status}")
-                    status_cell.alignment = indent_align
-                    
-                    # Apply special fill if this is a special status
-                    if status == 'Declined' or status == 'Cancelled':
-                        status_cell.fill = declined_fill if status == 'Declined' else cancelled_fill
+                    # Special statuses are highlighted, the other status rows alternate
+                    if status in ('Declined', 'Cancelled'):
+                        label_style, count_style, total_style = STYLE_STATUS_LABEL_DECLINED, STYLE_COUNT_DECLINED, STYLE_STATUS_TOTAL_DECLINED
+                    elif status_idx % 2 == 1:
+                        label_style, count_style, total_style = STYLE_STATUS_LABEL_ALT, STYLE_COUNT_ALT, STYLE_STATUS_TOTAL
+                    else:
+                        label_style, count_style, total_style = STYLE_STATUS_LABEL, STYLE_COUNT, STYLE_STATUS_TOTAL
                     
-                    # Track status total for this row
-                    status_prev_total = 0
+                    # Add the status name with indentation
+                    sheet.cell(row=row, column=1, value=f"{status}").style = label_style
                     
                     # Add data for each team member
                     for member_idx, team_member in enumerate(team_members):
-                        prev_counts = category_data['prev'].get(team_member, {})
-                        
-                        # Get the count for this status, default to 0 if not found
-                        prev_count = prev_counts.get(status, 0)
-                        
-                        # Add to totals
-                        status_prev_total += prev_count
-                        
-                        # Add the count to the cell for this team member
-                        cell = sheet.cell(row=row, column=member_idx + 2, value=f"{prev_count}")
-                        
-                        # Apply special fill if this is a special status
-                        if status == 'Declined':
-                            cell.fill = declined_fill
-                        elif status == 'Cancelled':
-                            cell.fill = cancelled_fill
+                        prev_count = cube.count(team_name, team_member, category, status)
+                        sheet.cell(row=row, column=member_idx + 2, value=f"{prev_count}").style = count_style
                     
                     # Add status total to the totals column - without brackets
-                    total_cell = sheet.cell(row=row, column=total_cols, value=f"{status_prev_total}")
-                    total_cell.alignment = center_align
-                    total_cell.font = subheader_font
-                    
-                    if status == 'Declined':
-                        total_cell.fill = declined_fill
-                    elif status == 'Cancelled':
-                        total_cell.fill = cancelled_fill
-                    else:
-                        total_cell.fill = totals_fill
-                    
-                    # Style the row
-                    for col in range(1, total_cols + 1):
-                        cell = sheet.cell(row=row, column=col)
-                        if col < total_cols:  # Skip the totals column as it's styled above
-                            cell.font = normal_font
-                            cell.border = thin_border
-                            
-                            if col > 1:
-                                cell.alignment = center_align
-                            
-                            # Apply alternating colors
-                            if status_idx % 2 == 1 and status not in ['Declined', 'Cancelled']:
-                                cell.fill = alternating_fill
-                        else:
-                            # Make sure the total cell has a border
-                            cell.border = thin_border
+                    status_prev_total = cube.status_total(team_name, category, status)
+                    sheet.cell(row=row, column=total_cols, value=f"{status_prev_total}").style = total_style
                     
                     row += 1
             
             # Add total rows
             total_row = row
-            total_cell = sheet.cell(row=total_row, column=1, value="TOTAL")
-            total_cell.font = bold_font
-            total_cell.fill = header_fill
-            total_cell.border = thin_border
+            sheet.cell(row=total_row, column=1, value="TOTAL").style = STYLE_TOTAL_LABEL
             
-            # Calculate totals for each team member across all categories
-            grand_total_prev = 0
+            # Totals for each team member across all categories
+            grand_total_prev = cube.team_total(team_name)
             
             for member_idx, team_member in enumerate(team_members):
-                member_prev_total = 0
-                
-                for category_key_for_total, category_val_for_total in team_data.items():
-                    if category_key_for_total != 'aggregated_tracked_time': # Exclude the new key
-                        prev_counts = category_val_for_total['prev'].get(team_member, {})
-                        for status in status_categories:
-                            member_prev_total += prev_counts.get(status, 0)
-                
-                # Add to grand totals
-                grand_total_prev += member_prev_total
+                member_prev_total = cube.member_total(team_name, team_member)
                 
                 # Add totals for this team member (without brackets)
-                sheet.cell(row=total_row, column=member_idx + 2, value=f"{member_prev_total}")
+                sheet.cell(row=total_row, column=member_idx + 2, value=f"{member_prev_total}").style = STYLE_TOTAL
             
             # Add grand total to the totals column
-            grand_total_cell = sheet.cell(row=total_row, column=total_cols, value=f"{grand_total_prev}")
-            grand_total_cell.font = bold_font
-            grand_total_cell.alignment = center_align
-            grand_total_cell.fill = header_fill
-            grand_total_cell.border = thin_border
+            sheet.cell(row=total_row, column=total_cols, value=f"{grand_total_prev}").style = STYLE_TOTAL
 
             # Insert 'Story Points' and 'Tracked Time' rows after TOTAL
-            # Calculate total story points for the team for the previous sprint
-            team_story_points_total = 0
-            team_tracked_time_total = 0 
+            # Total story points and tracked time of the team for the previous sprint
+            team_story_points_total = cube.team_story_point_total(team_name)
+            team_tracked_time_total = cube.team_hours_total(team_name)
 
             for offset, label in enumerate(["Story Points", "Tracked Time"]):
                 metric_row = total_row + 1 + offset
                 for col_idx in range(1, total_cols + 1):
                     cell = sheet.cell(row=metric_row, column=col_idx)
-                    ref_cell = sheet.cell(row=total_row, column=col_idx)
-
-                    # Copy style from TOTAL row
-                    if col_idx == 1 or col_idx == total_cols:
-                        # Label or Status Totals column: copy TOTAL row style
-                        cell.fill = copy(ref_cell.fill)
-                        cell.font = copy(ref_cell.font)
-                        cell.alignment = copy(ref_cell.alignment)
-                        cell.border = copy(ref_cell.border)
-                    else:
-                        # Employee columns: style like TOTAL employee cells
-                        cell.fill = header_fill
-                        cell.font = bold_font
-                        cell.alignment = center_align
-                        cell.border = thin_border
+                    # Styled like the TOTAL row
+                    cell.style = STYLE_TOTAL_LABEL if col_idx == 1 else STYLE_TOTAL
 
                     if col_idx == 1:
                         cell.value = label
@@ -864,33 +2171,18 @@ def create_xlsx_report(data, wb):
                         # Calculate story points for each member
                         if col_idx <= member_count + 1: 
                             member_name = team_members[col_idx - 2] 
-                            member_story_points = 0
-                            # Sum story points from all categories for the current member
-                            for category_key_sp, category_val_sp in team_data.items():
-                                if category_key_sp != 'aggregated_tracked_time': # Exclude the new key
-                                    member_story_points += category_val_sp['story_points']['prev'].get(member_name, 0.0)
-                            cell.value = member_story_points
-                            team_story_points_total += member_story_points
+                            # Story points from all categories for the current member
+                            cell.value = cube.member_story_point_total(team_name, member_name)
                         elif col_idx == total_cols: # Total story points for the team
                             cell.value = team_story_points_total
                     elif label == "Tracked Time": 
                         if col_idx <= member_count + 1: 
                             member_name = team_members[col_idx - 2] 
-                            # Retrieve tracked time directly from the team_data's aggregated_tracked_time
-                            member_tracked_time = team_data['aggregated_tracked_time']['prev'].get(member_name, 0.0)
+                            member_tracked_time = cube.member_hours(team_name, member_name)
                             cell.value = f"{member_tracked_time:.2f}" # Format to 2 decimal places
-                            team_tracked_time_total += member_tracked_time
                         elif col_idx == total_cols: # Total tracked time for the team
                             cell.value = f"{team_tracked_time_total:.2f}" # Format to 2 decimal places
             
-            # Style total cells
-            for col in range(2, total_cols):
-                cell = sheet.cell(row=total_row, column=col)
-                cell.font = bold_font
-                cell.alignment = center_align
-                cell.fill = header_fill
-                cell.border = thin_border
-            
             # Add spacing between teams
             row = total_row + 4
         
@@ -898,20 +2190,32 @@ def create_xlsx_report(data, wb):
         row += 1
         sheet.cell(row=row, column=1, value=f"Previous Sprint: {PREV_SPRINT_START} to {PREV_SPRINT_END}")
         row += 1
+        if TREND_PERIODS:
+            trend_start = next(iter(TREND_PERIODS.values()))[0]
+            trend_end = list(TREND_PERIODS.values())[-1][1][:10]
+            sheet.cell(row=row, column=1, value=f"Trend: {len(TREND_PERIODS)} sprints from {trend_start} to {trend_end} (see the Trends sheet)")
+            row += 1
         sheet.cell(row=row, column=1, value=f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         
         # Create consolidated summary across all teams
-        create_consolidated_summary(wb, data) 
-        add_consolidated_status_table(wb) 
+        create_consolidated_summary(wb, cube) 
+        add_consolidated_status_table(wb, task_frame) 
+        
+        # Chart the category split of each team
+        add_team_pie_charts(wb, data, cube)
+        
+        # Multi-sprint trend tables and charts
+        if TREND_PERIODS:
+            create_trend_sheet(wb, data, cube)
         
         # Save the workbook
-        wb.save(OUTPUT_PATH)
-        print(f"Report saved to {OUTPUT_PATH}")
+        with RUN_STATS.phase('save'):
+            wb.save(OUTPUT_PATH)
+        RUN_STATS.count('cells_written', wb.cell_count)
+        logger.info(f"Report saved to {OUTPUT_PATH}")
         
     except Exception as e:
-        print(f"Error creating Excel report: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error creating Excel report: {e}")
         raise
 
 def create_detailed_sheets(wb, data):
@@ -922,10 +2226,7 @@ def create_detailed_sheets(wb, data):
     # Setup headers for "Task Details" sheet
     headers_details = ["Team", "Category", "Key", "Summary", "Status", "Assignee", "Period", "Story Points", "Time Spent (Hours)"] 
     for col, header in enumerate(headers_details, 1):
-        cell = details_sheet.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-        cell.fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+        details_sheet.cell(row=1, column=col, value=header).style = STYLE_DETAILS_HEADER
     
     # Set column widths for "Task Details" sheet
     details_sheet.column_dimensions['A'].width = 15  # Team
@@ -959,6 +2260,7 @@ def create_detailed_sheets(wb, data):
                     # Time spent per task within the period is not easily available here from the aggregated data
                     details_sheet.cell(row=row_details, column=9, value=f"{0.0:.2f}") 
                     row_details += 1
+                    wb.flush(details_sheet, row_details)
     
     # Create team-specific sheets
     for team_name, team_data in data.items():
@@ -967,10 +2269,7 @@ def create_detailed_sheets(wb, data):
         # Setup headers for team-specific sheets (including hidden columns for data integrity)
         headers_team = ["Category", "Team Member", "Status", "Key", "Summary", "Story Points", "Time Spent (Hours)"] 
         for col, header in enumerate(headers_team, 1):
-            cell = team_sheet.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-            cell.fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+            team_sheet.cell(row=1, column=col, value=header).style = STYLE_DETAILS_HEADER
         
         # Set column widths for team-specific sheets
         team_sheet.column_dimensions['A'].width = 15  # Category
@@ -988,12 +2287,7 @@ def create_detailed_sheets(wb, data):
         team_sheet.column_dimensions['G'].hidden = True 
 
         # Get the status categories for this team
-        status_mapping = TEAM_STATUS_MAPPINGS.get(team_name, STATUS_MAPPING)
-        status_categories = ['To Do', 'In Development', 'Completed']
-        if 'DECLINED' in status_mapping:
-            status_categories.append('Declined')
-        if 'CANCELLED' in status_mapping:
-            status_categories.append('Cancelled')
+        status_categories = team_status_categories(team_name)
         
         # Add data
         row = 2
@@ -1004,29 +2298,21 @@ def create_detailed_sheets(wb, data):
         for category in display_categories:
             category_data = team_data[category] # Get the actual category data
             # Add category header
-            cell = team_sheet.cell(row=row, column=1, value=category)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid")
+            team_sheet.cell(row=row, column=1, value=category).style = STYLE_SHEET_CATEGORY
             # Adjusted merge range to only cover visible columns (A, B, C)
             team_sheet.merge_cells(start_row=row, start_column=1, end_row=row, end_column=3) 
             row += 1
             
             for team_member in TEAMS[team_name]:
                 # Add team member header
-                cell = team_sheet.cell(row=row, column=2, value=team_member)
-                cell.font = Font(bold=True)
+                team_sheet.cell(row=row, column=2, value=team_member).style = STYLE_MEMBER
                 row += 1
                 
                 # Add sections for each status category
                 for status in status_categories:
                     cell = team_sheet.cell(row=row, column=3, value=status)
-                    cell.font = Font(italic=True)
-                    
                     # Apply special formatting for special statuses
-                    if status == 'Declined':
-                        cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                    elif status == 'Cancelled':
-                        cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+                    cell.style = STYLE_STATUS_NAME_DECLINED if status in ('Declined', 'Cancelled') else STYLE_STATUS_NAME
                     
                     row += 1
                     
@@ -1047,30 +2333,275 @@ def create_detailed_sheets(wb, data):
                         row += 1
                 
                 row += 1  # Add space between team members
+                wb.flush(team_sheet, row)
             
             row += 1  # Add space between categories
 
-def main():
-    print("\n--- Entering main function ---") # Added print statement here
+class ConsoleFormatter(logging.Formatter):
+    """Plain messages on the console; warnings and errors are prefixed with their level."""
+
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname}: {message}"
+        return message
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per log record, including the fields passed with `extra=`."""
+    RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage().strip(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(console_level=logging.INFO, log_file=None):
+    """Send the report's log to the console at console_level and, if log_file is set, everything as JSON lines to log_file."""
+    report_logger = logging.getLogger('jira_kpi_report')
+    report_logger.handlers.clear()
+    report_logger.setLevel(logging.DEBUG if log_file else console_level)
+    report_logger.propagate = False
     
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(ConsoleFormatter())
+    report_logger.addHandler(console_handler)
+    
+    if log_file:
+        file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        report_logger.addHandler(file_handler)
+
+
+def is_valid_period_date(value):
+    """True if a period date is a relative '-Nd' date or an absolute 'YYYY-MM-DD' / 'YYYY-MM-DD HH:MM' date."""
+    if re.fullmatch(r'-\d+d', value):
+        return True
+    for date_format in ("%Y-%m-%d", "%Y-%m-%d %H:%M"):
+        try:
+            datetime.strptime(value, date_format)
+            return True
+        except ValueError:
+            pass
+    return False
+
+def check_config():
+    """Return the problems found in the report configuration (an empty list if there are none)."""
+    problems = []
+    if not TEAMS:
+        problems.append("TEAMS is empty")
+    for team_name, members in TEAMS.items():
+        if not members:
+            problems.append(f"team '{team_name}' has no members")
+        for category in TEAM_CATEGORIES.get(team_name, []):
+            if category not in TASK_CATEGORIES:
+                problems.append(f"category '{category}' of team '{team_name}' is not defined in TASK_CATEGORIES")
+    for category, queries in TASK_CATEGORIES.items():
+        for query_name, query in queries.items():
+            if '{date_start}' not in query or '{date_end}' not in query:
+                problems.append(f"{query_name} of category '{category}' has no {{date_start}} / {{date_end}} placeholders")
+    for period, (date_start, date_end) in SPRINT_PERIODS.items():
+        for value in (date_start, date_end):
+            if not is_valid_period_date(value):
+                problems.append(f"period '{period}' has an invalid date '{value}' (expected '-Nd' or 'YYYY-MM-DD')")
+    if XLSX_WRITER_BACKEND not in ('openpyxl', 'streaming'):
+        problems.append(f"unknown XLSX_WRITER_BACKEND '{XLSX_WRITER_BACKEND}'")
+    if WORKLOG_FETCH_MODE not in ('feed', 'search'):
+        problems.append(f"unknown WORKLOG_FETCH_MODE '{WORKLOG_FETCH_MODE}'")
+    missing_libraries = [module for module in REPORT_LIBRARIES if importlib.util.find_spec(module) is None]
+    if missing_libraries:
+        problems.append(f"missing libraries: {', '.join(missing_libraries)} (pip install -r requirements.txt)")
+    output_dir = os.path.dirname(os.path.abspath(OUTPUT_PATH))
+    if not os.access(output_dir, os.W_OK):
+        problems.append(f"report directory {output_dir} is not writable")
+    return problems
+
+def check_credentials():
+    """Check the Jira credentials with one /myself request; return (account display name, None) or (None, problem)."""
+    if not JIRA_EMAIL or not JIRA_API_TOKEN or JIRA_EMAIL.startswith('<') or JIRA_API_TOKEN.startswith('<'):
+        return None, "JIRA_EMAIL / JIRA_API_TOKEN are not set"
+    import base64
+    import urllib.error
+    import urllib.request
+    token = base64.b64encode(f"{JIRA_EMAIL}:{JIRA_API_TOKEN}".encode('utf-8')).decode('ascii')
+    request = urllib.request.Request(f"{JIRA_SERVER.rstrip('/')}/rest/api/2/myself",
+                                     headers={'Authorization': f'Basic {token}', 'Accept': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=CHECK_TIMEOUT_SECONDS) as response:
+            account = json_loads(response.read())
+    except urllib.error.HTTPError as e:
+        if e.code in (401, 403):
+            return None, f"Jira rejected the credentials of {JIRA_EMAIL} (HTTP {e.code})"
+        return None, f"Jira answered HTTP {e.code} for {JIRA_SERVER}"
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return None, f"can't reach Jira at {JIRA_SERVER}: {getattr(e, 'reason', e)}"
+    return account.get('displayName') or account.get('emailAddress') or JIRA_EMAIL, None
+
+def run_check():
+    """Preflight (--check): validate the configuration and the Jira credentials. Returns True if both are fine."""
+    started = time.perf_counter()
+    problems = check_config()
+    if all(is_mock_team(team_name) for team_name in TEAMS):
+        logger.info("All teams use mock data, Jira credentials not checked")
+    else:
+        account, problem = check_credentials()
+        if problem:
+            problems.append(problem)
+        else:
+            logger.info(f"Jira credentials OK: signed in to {JIRA_SERVER} as {account}")
+    for problem in problems:
+        logger.error(f"Check failed: {problem}")
+    elapsed = time.perf_counter() - started
+    if problems:
+        logger.error(f"Check found {len(problems)} problem(s) in {elapsed:.2f}s")
+        return False
+    logger.info(f"Configuration and credentials OK ({elapsed:.2f}s)")
+    return True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the sprint KPI report from Jira.")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help="only show warnings and errors")
+    verbosity.add_argument('-v', '--verbose', action='store_true',
+                           help="also show the detailed trace (every query, issue and worklog)")
+    parser.add_argument('--log-file', default=LOG_FILE, help="write the detailed trace to this file as JSON lines")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile the run with cProfile (saved next to the report as .prof, top functions logged)")
+    stages = parser.add_mutually_exclusive_group()
+    stages.add_argument('--fetch-only', action='store_true',
+                        help="only fetch the data and save the snapshot, don't write the report")
+    stages.add_argument('--from-snapshot', metavar='PATH',
+                        help="build the report from a saved data snapshot instead of fetching it from Jira")
+    stages.add_argument('--render-only', action='store_true',
+                        help="build the report from the snapshot of the last run (same as --from-snapshot with its path)")
+    stages.add_argument('--check', action='store_true',
+                        help="only validate the configuration and the Jira credentials (exit status 1 on problems)")
+    parser.add_argument('--export', dest='export_formats', action='append', choices=list(EXPORT_WRITERS), metavar='FORMAT',
+                        help="also write the dataset (tasks, worklog hours, KPIs) next to the report as "
+                             "parquet, csv or jsonl; can be repeated (default: EXPORT_FORMATS)")
+    parser.add_argument('--trend-sprints', type=int, default=TREND_SPRINT_COUNT, metavar='N',
+                        help="also report a trend over N consecutive sprints on the Trends sheet (default: %(default)s)")
+    parser.add_argument('--sprint-length', type=int, default=TREND_SPRINT_LENGTH_DAYS, metavar='DAYS',
+                        help="length of a trend sprint in days (default: %(default)s)")
+    parser.add_argument('--first-sprint-start', default=TREND_FIRST_SPRINT_START, metavar='YYYY-MM-DD',
+                        help="start date of the first trend sprint (default: the last sprints up to today)")
+    args = parser.parse_args(argv)
+    try:
+        build_trend_periods(args.trend_sprints, args.sprint_length, args.first_sprint_start)
+    except ValueError as e:
+        parser.error(f"invalid trend sprints: {e}")
+    if args.export_formats is None:
+        args.export_formats = list(EXPORT_FORMATS)
+    unknown_formats = [export_format for export_format in args.export_formats if export_format not in EXPORT_WRITERS]
+    if unknown_formats:
+        parser.error(f"unknown export formats in EXPORT_FORMATS: {', '.join(unknown_formats)}")
+    if 'parquet' in args.export_formats and not parquet_engine_available():
+        parser.error("Parquet export needs pyarrow (pip install pyarrow) or fastparquet")
+    args.export_formats = list(dict.fromkeys(args.export_formats))
+    if args.render_only:
+        args.from_snapshot = get_run_file_path('.snapshot.json.gz')
+    if args.from_snapshot and not os.path.exists(args.from_snapshot):
+        parser.error(f"snapshot {args.from_snapshot} not found; run the report (or --fetch-only) first")
+    return args
+
+
+def get_run_file_path(suffix):
+    """Path of a file that belongs to the report, e.g. sprint_report.run.json for suffix '.run.json'."""
+    return os.path.splitext(OUTPUT_PATH)[0] + suffix
+
+
+def log_profile(profiler):
+    """Save the cProfile stats next to the report and log the functions with the highest cumulative time."""
+    profile_path = get_run_file_path('.prof')
+    profiler.dump_stats(profile_path)
+    stats_text = io.StringIO()
+    pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    logger.info(f"Profile saved to {profile_path} (main thread only; fetch worker threads are timed in the run summary)")
+    logger.info(stats_text.getvalue())
+
+
+def save_snapshot(path, data, worklog_hours_by_day):
+    """
+    Save the fetch stage output (all_data and the member x day worklog hours) as gzipped JSON, together
+    with the teams and periods it was collected for.
+    """
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'teams': TEAMS,
+        'sprint_periods': SPRINT_PERIODS,
+        'trend_periods': TREND_PERIODS,
+        'all_data': data,
+        'worklog_hours_by_day': {member: {day.isoformat(): hours for day, hours in hours_by_day.items()}
+                                 for member, hours_by_day in worklog_hours_by_day.items()},
+    }
+    with gzip.open(path, 'wb', compresslevel=1) as snapshot_file:
+        snapshot_file.write(json_dumps_bytes(snapshot))
+
+def load_snapshot(path):
+    """
+    Load a snapshot saved by save_snapshot and return (all_data, worklog_hours_by_day).
+    TEAMS and TREND_PERIODS are set to the ones the snapshot was collected for; SPRINT_PERIODS must match it.
+    """
+    with gzip.open(path, 'rb') as snapshot_file:
+        snapshot = json_loads(snapshot_file.read())
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot {path} has version {snapshot.get('version')}, expected {SNAPSHOT_VERSION}; fetch the data again")
+    sprint_periods = {period: tuple(dates) for period, dates in snapshot['sprint_periods'].items()}
+    if sprint_periods != SPRINT_PERIODS:
+        raise ValueError(f"Snapshot {path} was fetched for the sprint periods {sprint_periods}, not {SPRINT_PERIODS}; fetch the data again")
+    TEAMS.clear()
+    TEAMS.update(snapshot['teams'])
+    TREND_PERIODS.clear()
+    TREND_PERIODS.update({period: tuple(dates) for period, dates in snapshot['trend_periods'].items()})
+    worklog_hours_by_day = {member: {datetime.strptime(day, "%Y-%m-%d").date(): hours for day, hours in hours_by_day.items()}
+                            for member, hours_by_day in snapshot['worklog_hours_by_day'].items()}
+    logger.info(f"Loaded the data snapshot of {snapshot['created']} from {path}")
+    return snapshot['all_data'], worklog_hours_by_day
+
+def fetch_stage():
+    """Fetch stage: collect all_data and the member x day worklog hours table from Jira (or mock data)."""
     # Show team members
     for team_name, members in TEAMS.items():
-        print(f"\n{team_name} Members:")
-        for member in members:
-            print(f"- {member}")
+        logger.debug(f"{team_name} Members: {', '.join(members)}")
     
-    # Connect to Jira
-    jira = connect_to_jira()
+    # Connect to Jira, unless every team uses mock data
+    if all(is_mock_team(team_name) for team_name in TEAMS):
+        logger.info("All teams use mock data, not connecting to Jira")
+        jira = None
+    else:
+        with RUN_STATS.phase('connect'):
+            jira = connect_to_jira()
     
     # Process all data
-    data = process_data(jira)
-    
+    with RUN_STATS.phase('classification'):
+        data, worklog_hours_by_day = process_data(jira)
+    if isinstance(jira, AsyncJiraTransport):
+        RUN_STATS.count('jira_requests', jira.request_count)
+        jira.close()
+    return data, worklog_hours_by_day
+
+def compute_stage(data):
+    """Compute stage: roll the data up once for all report sheets; returns (cube, task_frame)."""
+    with RUN_STATS.phase('rollup'):
+        return KpiCube(data), build_task_frame(data)
+
+def render_stage(data, worklog_hours_by_day, cube, task_frame, export_formats=()):
+    """Render stage: write the workbook (and the dataset in the given export formats)."""
+    from jira_kpi_report_writer import create_report_workbook
     # Create a new workbook once at the start of main
-    wb = openpyxl.Workbook()
-    
-    # Remove the default sheet created by openpyxl.Workbook() to avoid "Sheet"
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
+    wb = create_report_workbook(XLSX_WRITER_BACKEND)
+    register_report_styles(wb)
 
     # Explicitly create the "Summary" sheet first
     summary_sheet = wb.create_sheet("Summary", 0) 
@@ -1079,121 +2610,119 @@ def main():
     all_teams_summary_sheet = wb.create_sheet("All Teams Summary")
 
     # Call create_detailed_sheets BEFORE create_xlsx_report
-    create_detailed_sheets(wb, data)
+    with RUN_STATS.phase('detailed_sheets'):
+        create_detailed_sheets(wb, data)
     
-    # Pass the workbook to create_xlsx_report
-    create_xlsx_report(data, wb) 
+    # Pass the workbook to create_xlsx_report (the save is timed as its own phase)
+    with RUN_STATS.phase('summary_sheets'):
+        create_xlsx_report(data, wb, cube, task_frame) 
     
-    print("Done!")
+    if export_formats:
+        with RUN_STATS.phase('export'):
+            export_dataset(export_formats, task_frame, worklog_hours_by_day, cube)
 
+def run_report(export_formats=(), from_snapshot=None, fetch_only=False):
+    """
+    Run the report stages: fetch the data from Jira (or load it from a snapshot), roll it up and
+    write the report (and the dataset in the given export formats). With fetch_only, stop after the
+    fetch stage has saved the snapshot.
+    """
+    if from_snapshot:
+        with RUN_STATS.phase('snapshot_load'):
+            data, worklog_hours_by_day = load_snapshot(from_snapshot)
+    else:
+        data, worklog_hours_by_day = fetch_stage()
+        if WRITE_SNAPSHOT or fetch_only:
+            snapshot_path = get_run_file_path('.snapshot.json.gz')
+            with RUN_STATS.phase('snapshot_save'):
+                save_snapshot(snapshot_path, data, worklog_hours_by_day)
+            logger.info(f"Data snapshot saved to {snapshot_path}")
+    if fetch_only:
+        return
+    
+    cube, task_frame = compute_stage(data)
+    render_stage(data, worklog_hours_by_day, cube, task_frame, export_formats)
 
-def add_consolidated_status_table(wb):
-    """Add a consolidated status table to the 'Summary' sheet, using same styling."""
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO, args.log_file)
+    logger.debug("--- Entering main function ---")
+    
+    if args.check:
+        sys.exit(0 if run_check() else 1)
+    
+    # A snapshot brings the trend sprints it was fetched with
+    if not args.from_snapshot:
+        set_trend_periods(args.trend_sprints, args.sprint_length, args.first_sprint_start)
+        scale_mock_teams(MOCK_MEMBER_SCALE)
+    if TREND_PERIODS:
+        logger.info(f"Trend over {len(TREND_PERIODS)} sprints of {args.sprint_length} days starting {next(iter(TREND_PERIODS))}")
+    
+    RUN_STATS.start()
+    profiler = cProfile.Profile() if args.profile else None
+    status = 'failed'
+    try:
+        if profiler is not None:
+            profiler.enable()
+        run_report(args.export_formats, args.from_snapshot, args.fetch_only)
+        status = 'ok'
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            log_profile(profiler)
+        if WRITE_RUN_SUMMARY:
+            summary_path = get_run_file_path('.run.json')
+            RUN_STATS.write(summary_path, status)
+            logger.info(f"Run summary saved to {summary_path}")
+    
+    logger.info("Done!")
+
+
+def add_consolidated_status_table(wb, task_frame):
+    """
+    Add a consolidated status table (previous sprint tasks per team and status category,
+    pivoted from the task frame) to the 'Summary' sheet, using same styling.
+    """
     summary_sheet = wb["Summary"]
 
     # Find last row and insert title
     last_row = summary_sheet.max_row + 2
-    summary_sheet.cell(row=last_row, column=1, value="Consolidated Status Table by Team").font = Font(bold=True, size=12)
+    summary_sheet.cell(row=last_row, column=1, value="Consolidated Status Table by Team").style = STYLE_TABLE_TITLE
     last_row += 2
 
-    # Collect data
-    status_data = []
-    # Iterate through all team-specific task detail sheets
-    for sheet_name in wb.sheetnames:
-        # Only process sheets that are team-specific, not the summary or details sheets
-        if sheet_name in ["Summary", "Task Details", "All Teams Summary"]:
-            continue
-        ws = wb[sheet_name]
-        rows = list(ws.values)
-        if not rows:
-            continue
-        # Headers are dynamic, look for 'Key' and 'Status'
-        # Assuming the first row of team-specific sheets contains headers
-        headers = [cell.value for cell in ws[1]] 
-        
-        # Find the column indices for 'Key' and 'Status'
-        try:
-            key_col_idx = headers.index("Key")
-            status_col_idx = headers.index("Status")
-        except ValueError:
-            print(f"Skipping sheet '{sheet_name}' as 'Key' or 'Status' column not found.")
-            continue
-
-        # Extract data, skipping header row (row 1) and empty rows
-        sheet_rows_data = []
-        for r_idx in range(2, ws.max_row + 1): # Start from row 2 (after header)
-            row_data = [cell.value for cell in ws[r_idx]]
-            # Ensure row_data has enough elements before accessing indices
-            if len(row_data) > max(key_col_idx, status_col_idx) and row_data[key_col_idx] is not None:
-                sheet_rows_data.append({
-                    'Key': row_data[key_col_idx],
-                    'Status': row_data[status_col_idx]
-                })
-
-        if sheet_rows_data:
-            df = pd.DataFrame(sheet_rows_data)
-            df["Team"] = sheet_name.replace(" TEAM", "") # Clean up team name for pivot
-            status_data.append(df)
-
-    if not status_data:
-        print("No data found for consolidated table.")
+    # Previous sprint tasks of all teams
+    prev_tasks = task_frame[task_frame["Period"] == "prev"]
+    if prev_tasks.empty:
+        logger.warning("No data found for consolidated table.")
         return
 
-    combined_df = pd.concat(status_data)
     pivot = (
-        combined_df.groupby(["Team", "Status"])
+        prev_tasks.groupby([prev_tasks["Team"].str.replace(" TEAM", "", regex=False), "StatusCategory"])  # Clean up team name for pivot
         .size()
-        .reset_index(name="Count")
-        .pivot(index="Team", columns="Status", values="Count")
-        .fillna(0)
-        .astype(int)
+        .unstack(fill_value=0)
+        .rename_axis(index="Team", columns=None)
         .reset_index()
     )
 
-    # Style setup
-    header_font = Font(bold=True, size=11)
-    cell_font = Font(size=11)
-    center_align = Alignment(horizontal='center', vertical='center')
-    left_align = Alignment(horizontal='left', vertical='center')
-    header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-    total_fill = PatternFill(start_color="FFE699", end_color="FFE699", fill_type="solid")
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-
     # Write headers
     for col_idx, col_name in enumerate(pivot.columns, 1):
-        cell = summary_sheet.cell(row=last_row, column=col_idx, value=col_name)
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.fill = header_fill
-        cell.border = thin_border
+        summary_sheet.cell(row=last_row, column=col_idx, value=col_name).style = STYLE_HEADER
 
     # Write data
     for r_idx, row in enumerate(pivot.itertuples(index=False), start=last_row + 1):
         for c_idx, value in enumerate(row, 1):
-            cell = summary_sheet.cell(row=r_idx, column=c_idx, value=value)
-            cell.font = cell_font
-            cell.alignment = center_align
-            cell.border = thin_border
+            summary_sheet.cell(row=r_idx, column=c_idx, value=value).style = STYLE_COUNT
 
     # Add total row
     total_row = summary_sheet.max_row + 1
-    summary_sheet.cell(row=total_row, column=1, value="TOTAL").font = Font(bold=True)
-    summary_sheet.cell(row=total_row, column=1).fill = total_fill
-
-    for col in range(2, pivot.shape[1] + 1):
-        total = 0
-        for r in range(last_row + 1, total_row):
-            val = summary_sheet.cell(row=r, column=col).value
-            if isinstance(val, int):
-                total += val
-        cell = summary_sheet.cell(row=total_row, column=col, value=total)
-        cell.font = Font(bold=True)
-        cell.fill = total_fill
-        cell.alignment = center_align
-        cell.border = thin_border
-
-    print("✅ Consolidated styled table added to Summary.")
+    summary_sheet.cell(row=total_row, column=1, value="TOTAL").style = STYLE_GRAND_TOTAL_LABEL
+
+    for col, col_name in enumerate(pivot.columns[1:], 2):
+        total = int(pivot[col_name].sum())
+        summary_sheet.cell(row=total_row, column=col, value=total).style = STYLE_GRAND_TOTAL
+
+    logger.info("✅ Consolidated styled table added to Summary.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio-based Jira transport for the KPI report read paths:
+issue search (paginated), issue worklog list and issue changelog, plus plain
+GET/POST access for other REST resources (e.g. the bulk worklog endpoints).
+
+All requests share one aiohttp connection pool with keep-alive connections and a
+configurable number of requests in flight. Results are returned as raw JSON dicts,
+so no jira `Resource` objects are built. AsyncJiraTransport runs its event loop in
+a background thread and exposes blocking methods, so it can be called from the
+report's fetch worker threads.
+
+Requires aiohttp; check AIOHTTP_AVAILABLE and fall back to the jira client when it is missing.
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import random
+import threading
+
+# aiohttp is imported when the transport opens its session, so importing this module stays cheap
+AIOHTTP_AVAILABLE = importlib.util.find_spec('aiohttp') is not None
+
+# Optional faster JSON decoder for large responses
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+API_PREFIX = '/rest/api/2'
+
+logger = logging.getLogger('jira_kpi_report.async')
+
+
+class JiraTransportError(Exception):
+    """Raised when Jira answers with an error status that is not retried (or retries ran out)."""
+
+    def __init__(self, status, message, url):
+        super().__init__(f"HTTP {status} for {url}: {message}")
+        self.status_code = status
+        self.url = url
+
+
+class AsyncJiraTransport:
+    """Pooled keep-alive Jira REST client running on its own asyncio event loop."""
+
+    def __init__(self, server, email, api_token, max_in_flight=8, page_size=100,
+                 max_retries=5, max_retry_delay=60.0, timeout=60):
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp is not installed")
+        self.server = server.rstrip('/')
+        self.email = email
+        self.api_token = api_token
+        self.max_in_flight = max(1, max_in_flight)
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.max_retry_delay = max_retry_delay
+        self.timeout = timeout
+        self.request_count = 0
+        self._paused_until = 0.0
+        self._session = None
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='jira-async-transport', daemon=True)
+        self._thread.start()
+        self._run(self._open())
+
+    # --- Blocking API, safe to call from any thread ---
+
+    def search(self, jql, fields, max_results=None):
+        """Return raw issue dicts matching jql; all pages unless max_results limits the count."""
+        return self._run(self.search_async(jql, fields, max_results))
+
+    def worklogs(self, issue_key):
+        """Return the complete list of raw worklog dicts of an issue."""
+        return self._run(self.worklogs_async(issue_key))
+
+    def changelog(self, issue_key):
+        """Return the complete list of raw changelog history dicts of an issue."""
+        return self._run(self.changelog_async(issue_key))
+
+    def get_json(self, path, params=None):
+        """GET a REST API resource (path relative to /rest/api/2) and return the decoded JSON."""
+        return self._run(self._request('GET', path, params=params))
+
+    def post_json(self, path, body):
+        """POST a JSON body to a REST API resource (path relative to /rest/api/2) and return the decoded JSON."""
+        return self._run(self._request('POST', path, json_body=body))
+
+    def myself(self):
+        """Return the authenticated user; used to check the connection and credentials."""
+        return self._run(self._request('GET', 'myself'))
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    # --- Coroutines ---
+
+    async def _open(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(self.email, self.api_token),
+            headers={'Accept': 'application/json'},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    async def _request(self, method, path, params=None, json_body=None):
+        url = f"{self.server}{API_PREFIX}/{path}"
+        for attempt in range(self.max_retries + 1):
+            # A 429 on any request pauses every request of the transport
+            pause = self._paused_until - self._loop.time()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            async with self._semaphore:
+                self.request_count += 1
+                async with self._session.request(method, url, params=params, json=json_body) as response:
+                    if response.status < 400:
+                        return await response.json(content_type=None, loads=json_loads)
+                    message = await response.text()
+                    retry_after = response.headers.get('Retry-After')
+            if response.status not in (429, 503) or attempt == self.max_retries:
+                raise JiraTransportError(response.status, message[:200], url)
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                # Exponential backoff with jitter when Jira doesn't say how long to wait
+                delay = 2.0 * 2 ** attempt * (0.5 + random.random() / 2)
+            delay = min(self.max_retry_delay, delay)
+            self._paused_until = max(self._paused_until, self._loop.time() + delay)
+            logger.warning(f"Jira is throttling requests (HTTP {response.status}): pausing for {delay:.1f}s")
+
+    async def search_async(self, jql, fields, max_results=None):
+        page_size = self.page_size if max_results is None else min(self.page_size, max_results)
+        params = {'jql': jql, 'fields': fields, 'startAt': 0, 'maxResults': page_size}
+        first_page = await self._request('GET', 'search', params=params)
+        issues = list(first_page.get('issues', []))
+        total = first_page.get('total', len(issues))
+        if max_results is not None:
+            total = min(total, max_results)
+        # Jira may cap the page size below what we asked for; page by what it actually returned
+        page_size = first_page.get('maxResults') or len(issues)
+        if not page_size:
+            return issues
+        # The total is known after the first page, so the remaining pages are fetched concurrently
+        remaining_pages = await asyncio.gather(*[
+            self._request('GET', 'search', params=dict(params, startAt=start_at, maxResults=page_size))
+            for start_at in range(page_size, total, page_size)
+        ])
+        for page in remaining_pages:
+            issues.extend(page.get('issues', []))
+        return issues[:total]
+
+    async def worklogs_async(self, issue_key):
+        return await self._get_all_pages(f"issue/{issue_key}/worklog", 'worklogs')
+
+    async def changelog_async(self, issue_key):
+        return await self._get_all_pages(f"issue/{issue_key}/changelog", 'values')
+
+    async def _get_all_pages(self, path, items_key):
+        """Fetch every page of a startAt/maxResults/total paginated resource."""
+        first_page = await self._request('GET', path, params={'startAt': 0, 'maxResults': self.page_size})
+        items = list(first_page.get(items_key, []))
+        total = first_page.get('total', len(items))
+        page_size = first_page.get('maxResults') or len(items)
+        if not page_size:
+            return items
+        remaining_pages = await asyncio.gather(*[
+            self._request('GET', path, params={'startAt': start_at, 'maxResults': page_size})
+            for start_at in range(page_size, total, page_size)
+        ])
+        for page in remaining_pages:
+            items.extend(page.get(items_key, []))
+        return items
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline end-to-end benchmark of the KPI report.
+
+Starts a fake Jira REST server on localhost that serves a seeded synthetic data set (issue
+search, bulk worklog feed, worklog list, ...) and runs jira_kpi_report.main() against it in a
+child process for each scale. Scale N means N times the members of every team in TEAMS, and so
+N times the issue and worklog volume. Every request to the fake server can be delayed by a
+fixed latency. For each run the benchmark reports wall time, the number of Jira requests and
+the peak RSS of the report process. No network access is needed.
+
+    python jira_kpi_report_benchmark.py
+    python jira_kpi_report_benchmark.py --scales 1,10 --latency 0.05
+    python jira_kpi_report_benchmark.py --scales 10 --set USE_ASYNC_TRANSPORT=False --set "WORKLOG_FETCH_MODE='search'"
+    python jira_kpi_report_benchmark.py --mock --scales 1,10,100
+
+With --mock no server is started: every team uses the report's synthetic mock data, scaled with
+MOCK_MEMBER_SCALE, so only the classification, rollup and rendering stages are measured.
+
+--set overrides a setting of jira_kpi_report before main() runs. Settings that are only read
+while the module is imported (JIRA_MAX_WORKERS, SEARCH_PAGE_SIZE) can't be changed this way.
+"""
+
+import argparse
+import ast
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import jira_kpi_report as report
+
+# Benchmark defaults
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_LATENCY = 0.02  # seconds added to every request to the fake server
+DEFAULT_SEED = 42
+
+# Volume of the synthetic data set at scale 1
+ISSUES_PER_MEMBER_CATEGORY = 6
+WORKLOGS_PER_MEMBER = 12
+UNTRACKED_WORKLOGS_PER_MEMBER = 4  # worklogs on issues outside the tracked projects
+UNMAPPED_STATUS_SHARE = 0.05  # share of issues in a status missing from the team's status mapping
+HISTORY_DAYS = 49  # status changes and worklogs are spread over this many days before now
+
+# Paging limits of the fake server, as on Jira Cloud
+SEARCH_MAX_RESULTS = 100
+WORKLOG_FIELD_MAX_RESULTS = 20  # worklogs embedded in a search result
+WORKLOG_FEED_PAGE_SIZE = 1000
+
+# Project keys of the projects referenced by name in TASK_CATEGORIES
+PROJECT_KEYS = {'Features and Ideas': 'FAI'}
+TEAM_PROJECTS = {'AMA TEAM': ['AMA'], 'BA TEAM': ['Features and Ideas']}
+DEFAULT_TEAM_PROJECTS = ['TWA', 'LDT', 'CWT']
+UNTRACKED_PROJECT = 'OPS'
+
+RESULT_MARKER = 'BENCHMARK_RESULT '
+
+
+def scaled_teams(scale):
+    """TEAMS with every member repeated scale times ("Name", "Name 2", ...); shared members stay shared."""
+    return {team_name: report.scale_members(members, scale) for team_name, members in report.TEAMS.items()}
+
+
+def format_jira_datetime(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+def parse_jql_date(value, now):
+    """Resolve a JQL date ('-21d', '-15m', 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM') against now."""
+    match = re.fullmatch(r'-(\d+)([dm])', value)
+    if match:
+        amount = int(match.group(1))
+        return now - (timedelta(days=amount) if match.group(2) == 'd' else timedelta(minutes=amount))
+    date_format = '%Y-%m-%d %H:%M' if len(value) > 10 else '%Y-%m-%d'
+    return datetime.strptime(value, date_format).replace(tzinfo=timezone.utc)
+
+
+def quoted_names(jql, field):
+    """Names matched by `field in ("a", "b")` or `field = "a"` in a JQL string."""
+    match = re.search(field + r'\s+in\s*\(([^)]*)\)', jql, flags=re.IGNORECASE)
+    if match:
+        return re.findall(r'"([^"]+)"', match.group(1))
+    match = re.search(field + r'\s*=\s*"([^"]+)"', jql, flags=re.IGNORECASE)
+    return [match.group(1)] if match else []
+
+
+def normalize_jql(jql):
+    return re.sub(r'\s+', '', jql).lower()
+
+
+class FakeJiraData:
+    """Seeded synthetic issues and worklogs for the teams of a benchmark scale."""
+
+    def __init__(self, scale, seed=DEFAULT_SEED):
+        self.scale = scale
+        self.now = datetime.now(timezone.utc)
+        self.teams = scaled_teams(scale)
+        self.issues = {}  # id -> issue record
+        self.issues_by_key = {}
+        self.category_issues = {}  # (category, project) -> [issue record]
+        self.worklogs = []  # sorted by updated time
+        self.search_cache = {}
+        self.lock = threading.Lock()
+
+        # Query signatures: the part of a category query before its date clause identifies the category
+        self.signatures = []
+        for category, category_info in report.TASK_CATEGORIES.items():
+            for query_key in ('query', 'ama_query'):
+                if query_key in category_info:
+                    template = category_info[query_key]
+                    signature = normalize_jql(template.split('statusCategoryChangedDate')[0])
+                    projects = re.findall(r'project\s*=\s*"([^"]+)"', template)
+                    self.signatures.append((signature, category, projects))
+        self.signatures.sort(key=lambda entry: -len(entry[0]))
+
+        self.generate(random.Random(seed))
+
+    def add_issue(self, project, fields, category=None):
+        project_key = PROJECT_KEYS.get(project, project)
+        issue_id = str(10000 + len(self.issues))
+        key = f"{project_key}-{len(self.issues) + 1}"
+        issue = {
+            'id': issue_id,
+            'key': key,
+            'category': category,
+            'project': project,
+            'worklogs': [],
+            'fields': dict(fields, summary=f"Synthetic issue {key}", project={'key': project_key, 'name': project}),
+        }
+        self.issues[issue_id] = issue
+        self.issues_by_key[key] = issue
+        if category is not None:
+            self.category_issues.setdefault((category, project), []).append(issue)
+        return issue
+
+    def generate(self, rng):
+        member_issues = {}
+        for team_name, members in self.teams.items():
+            status_mapping = report.TEAM_STATUS_MAPPINGS.get(team_name, report.STATUS_MAPPING)
+            statuses = [status for mapping_key, _ in report.STATUS_CATEGORY_KEYS for status in status_mapping.get(mapping_key, [])]
+            projects = TEAM_PROJECTS.get(team_name, DEFAULT_TEAM_PROJECTS)
+            for member in members:
+                for category in report.TEAM_CATEGORIES.get(team_name, []):
+                    for _ in range(ISSUES_PER_MEMBER_CATEGORY):
+                        changed_at = self.now - timedelta(minutes=rng.randrange(HISTORY_DAYS * 24 * 60))
+                        status = 'Waiting for QA' if rng.random() < UNMAPPED_STATUS_SHARE else rng.choice(statuses)
+                        issue = self.add_issue(rng.choice(projects), {
+                            'status': {'name': status},
+                            'assignee': {'displayName': member},
+                            'customfield_10149': rng.choice([None, 1.0, 2.0, 3.0, 5.0, 8.0]),
+                            'statuscategorychangedate': format_jira_datetime(changed_at),
+                            'updated': format_jira_datetime(changed_at + timedelta(hours=1)),
+                        }, category)
+                        issue['changed_at'] = changed_at
+                        member_issues.setdefault(member, []).append(issue)
+
+        untracked_issues = [self.add_issue(UNTRACKED_PROJECT, {'status': {'name': 'To Do'}, 'updated': format_jira_datetime(self.now)})
+                            for _ in range(max(1, len(member_issues) // 10))]
+        for member, issues in member_issues.items():
+            targets = [rng.choice(issues) for _ in range(WORKLOGS_PER_MEMBER)]
+            targets += [rng.choice(untracked_issues) for _ in range(UNTRACKED_WORKLOGS_PER_MEMBER)]
+            for issue in targets:
+                started = self.now - timedelta(minutes=rng.randrange(HISTORY_DAYS * 24 * 60))
+                worklog = {
+                    'id': str(100000 + len(self.worklogs)),
+                    'issueId': issue['id'],
+                    'author': {'displayName': member},
+                    'started': format_jira_datetime(started),
+                    'timeSpentSeconds': rng.choice([900, 1800, 3600, 7200, 14400]),
+                    'updated_ms': int((started + timedelta(hours=1)).timestamp() * 1000),
+                }
+                issue['worklogs'].append(worklog)
+                self.worklogs.append(worklog)
+
+        # Unique, increasing update times so the worklog feed can be paged by time
+        self.worklogs.sort(key=lambda worklog: worklog['updated_ms'])
+        for index, worklog in enumerate(self.worklogs):
+            worklog['updated_ms'] += index
+            worklog['updated'] = format_jira_datetime(datetime.fromtimestamp(worklog['updated_ms'] / 1000, timezone.utc))
+        self.worklogs_by_id = {worklog['id']: worklog for worklog in self.worklogs}
+        self.worklog_update_times = [worklog['updated_ms'] for worklog in self.worklogs]
+
+    @property
+    def task_issue_count(self):
+        return sum(len(issues) for issues in self.category_issues.values())
+
+    # --- Search ---
+
+    def search(self, jql):
+        """Return the issue records matching a JQL string (cached, since every page repeats the search)."""
+        with self.lock:
+            cached = self.search_cache.get(jql)
+        if cached is None:
+            cached = self.run_search(jql)
+            with self.lock:
+                self.search_cache[jql] = cached
+        return cached
+
+    def run_search(self, jql):
+        normalized = normalize_jql(jql)
+        changed_from = re.search(r'statusCategoryChangedDate\s*>=\s*"([^"]+)"', jql, flags=re.IGNORECASE)
+        changed_to = re.search(r'statusCategoryChangedDate\s*<=\s*"([^"]+)"', jql, flags=re.IGNORECASE)
+        updated_from = re.search(r'updated\s*>=\s*"([^"]+)"', jql, flags=re.IGNORECASE)
+        changed_from = parse_jql_date(changed_from.group(1), self.now) if changed_from else None
+        changed_to = parse_jql_date(changed_to.group(1), self.now) if changed_to else None
+        updated_from = parse_jql_date(updated_from.group(1), self.now) if updated_from else None
+
+        id_match = re.search(r'\bid\s+in\s*\(([^)]*)\)', jql, flags=re.IGNORECASE)
+        if id_match:
+            return [self.issues[issue_id] for issue_id in re.findall(r'\w+', id_match.group(1)) if issue_id in self.issues]
+
+        if 'worklogauthor' in normalized:
+            return self.search_worklog_issues(jql)
+
+        for signature, category, projects in self.signatures:
+            if signature in normalized:
+                assignees = set(quoted_names(jql, 'assignee'))
+                excluded = re.search(r'status\s+not\s+in\s*\(([^)]*)\)', jql, flags=re.IGNORECASE)
+                excluded = set(re.findall(r'"([^"]+)"', excluded.group(1))) if excluded else set()
+                return [issue for project in projects for issue in self.category_issues.get((category, project), [])
+                        if issue['fields']['assignee']['displayName'] in assignees
+                        and issue['fields']['status']['name'] not in excluded
+                        and (changed_from is None or issue['changed_at'] >= changed_from)
+                        and (changed_to is None or issue['changed_at'] <= changed_to)
+                        and (updated_from is None or issue['changed_at'] + timedelta(hours=1) >= updated_from)]
+
+        # Issues of whole projects, e.g. the issue store's `project in (...) AND updated >= ...`
+        projects = set(quoted_names(jql, 'project'))
+        return [issue for issue in self.issues.values()
+                if issue['project'] in projects and issue['category'] is not None
+                and (updated_from is None or issue['changed_at'] + timedelta(hours=1) >= updated_from)]
+
+    def search_worklog_issues(self, jql):
+        authors = set(quoted_names(jql, 'worklogAuthor'))
+        projects = set(re.findall(r'project\s*=\s*"([^"]+)"', jql))
+        date_from = re.search(r"worklogDate\s*>=\s*'([^']+)'", jql)
+        date_to = re.search(r"worklogDate\s*<=\s*'([^']+)'", jql)
+        date_from = parse_jql_date(date_from.group(1), self.now).date() if date_from else None
+        date_to = parse_jql_date(date_to.group(1), self.now).date() if date_to else None
+
+        def in_range(worklog):
+            started = datetime.strptime(worklog['started'][:10], '%Y-%m-%d').date()
+            return (date_from is None or started >= date_from) and (date_to is None or started <= date_to)
+
+        return [issue for issue in self.issues.values()
+                if (not projects or issue['project'] in projects)
+                and any(worklog['author']['displayName'] in authors and in_range(worklog) for worklog in issue['worklogs'])]
+
+    def issue_json(self, issue, fields):
+        """Issue as Jira returns it in search results, limited to the requested fields."""
+        requested = set(fields.split(',')) if fields else set(issue['fields'])
+        issue_fields = {field: value for field, value in issue['fields'].items() if field in requested}
+        if 'worklog' in requested:
+            issue_fields['worklog'] = {
+                'startAt': 0,
+                'maxResults': WORKLOG_FIELD_MAX_RESULTS,
+                'total': len(issue['worklogs']),
+                'worklogs': [self.worklog_json(worklog) for worklog in issue['worklogs'][:WORKLOG_FIELD_MAX_RESULTS]],
+            }
+        return {'id': issue['id'], 'key': issue['key'], 'fields': issue_fields}
+
+    @staticmethod
+    def worklog_json(worklog):
+        return {key: value for key, value in worklog.items() if key != 'updated_ms'}
+
+    # --- Worklog feed ---
+
+    def worklog_feed_page(self, since):
+        """Page of /worklog/updated: worklogs updated at or after since (epoch milliseconds)."""
+        start = bisect_left(self.worklog_update_times, since)
+        page = self.worklogs[start:start + WORKLOG_FEED_PAGE_SIZE]
+        last_page = start + WORKLOG_FEED_PAGE_SIZE >= len(self.worklogs)
+        return {
+            'values': [{'worklogId': int(worklog['id']), 'updatedTime': worklog['updated_ms']} for worklog in page],
+            'since': since,
+            'until': page[-1]['updated_ms'] + 1 if page else since,
+            'lastPage': last_page,
+        }
+
+
+class FakeJiraHandler(BaseHTTPRequestHandler):
+    """Serves the Jira REST resources the report uses from the server's FakeJiraData."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.handle_request(json.loads(self.rfile.read(length) or b'{}'))
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self, body=None):
+        self.server.count_request()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        data = self.server.data
+        url = urlparse(self.path)
+        path = url.path.replace('/rest/api/2/', '/', 1)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if path == '/serverInfo':
+            return self.send_json({'versionNumbers': [1001, 0, 0], 'deploymentType': 'Cloud', 'version': '1001.0.0'})
+        if path == '/myself':
+            return self.send_json({'displayName': 'Benchmark User', 'accountId': 'benchmark'})
+        if path == '/field':
+            return self.send_json([])
+        if path == '/search':
+            issues = data.search(params.get('jql', ''))
+            start_at = int(params.get('startAt', 0))
+            max_results = min(int(params.get('maxResults', 50)), SEARCH_MAX_RESULTS)
+            return self.send_json({
+                'startAt': start_at,
+                'maxResults': max_results,
+                'total': len(issues),
+                'issues': [data.issue_json(issue, params.get('fields')) for issue in issues[start_at:start_at + max_results]],
+            })
+        if path == '/worklog/updated':
+            return self.send_json(data.worklog_feed_page(int(params.get('since', 0))))
+        if path == '/worklog/deleted':
+            since = int(params.get('since', 0))
+            return self.send_json({'values': [], 'since': since, 'until': since, 'lastPage': True})
+        if path == '/worklog/list':
+            return self.send_json([data.worklog_json(data.worklogs_by_id[str(worklog_id)])
+                                   for worklog_id in (body or {}).get('ids', []) if str(worklog_id) in data.worklogs_by_id])
+        match = re.fullmatch(r'/issue/([^/]+)/worklog', path)
+        if match and match.group(1) in data.issues_by_key:
+            worklogs = [data.worklog_json(worklog) for worklog in data.issues_by_key[match.group(1)]['worklogs']]
+            start_at = int(params.get('startAt', 0))
+            max_results = int(params.get('maxResults', 50))
+            return self.send_json({'startAt': start_at, 'maxResults': max_results, 'total': len(worklogs),
+                                   'worklogs': worklogs[start_at:start_at + max_results]})
+        return self.send_json({'errorMessages': [f"Not supported by the benchmark server: {url.path}"]}, 404)
+
+
+class FakeJiraServer(ThreadingHTTPServer):
+    """Fake Jira REST server on a free localhost port, running on a background thread."""
+    daemon_threads = True
+
+    def __init__(self, data, latency=0.0):
+        super().__init__(('127.0.0.1', 0), FakeJiraHandler)
+        self.data = data
+        self.latency = latency
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, name='fake-jira', daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count_request(self):
+        with self.count_lock:
+            self.request_count += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def parse_setting(assignment):
+    """Parse a NAME=VALUE override; VALUE is a Python literal."""
+    name, _, value = assignment.partition('=')
+    if not hasattr(report, name):
+        raise argparse.ArgumentTypeError(f"jira_kpi_report has no setting {name}")
+    return name, ast.literal_eval(value)
+
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where the resource module is missing."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_report_process(args):
+    """Child process: run the report against the fake server and print the result line."""
+    if args.mock:
+        # Every team comes from the synthetic mock data generator, scaled by the report itself
+        report.USE_MOCK_BA_DATA = report.USE_MOCK_AMA_DATA = report.USE_MOCK_OTHER_DATA = True
+        report.MOCK_MEMBER_SCALE = args.scale
+        report.MOCK_DATA_SEED = args.seed
+    else:
+        report.JIRA_SERVER = args.server
+        report.JIRA_EMAIL = 'benchmark@example.com'
+        report.JIRA_API_TOKEN = 'benchmark'
+        teams = scaled_teams(args.scale)
+        report.TEAMS.clear()
+        report.TEAMS.update(teams)
+    report.OUTPUT_PATH = os.path.join(args.workdir, 'sprint_report.xlsx')
+    report.ISSUE_STORE_PATH = os.path.join(args.workdir, 'jira_issue_store.sqlite')
+    report.HISTORY_STORE_PATH = os.path.join(args.workdir, 'jira_kpi_history.sqlite')
+    for name, value in args.settings:
+        setattr(report, name, value)
+
+    report.main(['--quiet'])
+
+    with open(report.get_run_file_path('.run.json'), encoding='utf-8') as summary_file:
+        run_summary = json.load(summary_file)
+    members = len({member for members in report.TEAMS.values() for member in members})
+    print(RESULT_MARKER + json.dumps({'peak_rss_mb': get_peak_rss_mb(), 'members': members, 'run_summary': run_summary}))
+
+
+def run_report_command(scale, seed, settings, workdir, server_url=None):
+    """Run the report child process; without a server it runs on synthetic mock data. Returns (process, wall seconds)."""
+    command = [sys.executable, os.path.abspath(__file__), '--run-report', '--scale', str(scale),
+               '--seed', str(seed), '--workdir', workdir]
+    command += ['--server', server_url] if server_url else ['--mock']
+    for name, value in settings:
+        command += ['--set', f"{name}={value!r}"]
+    started = time.perf_counter()
+    process = subprocess.run(command, capture_output=True, text=True)
+    return process, time.perf_counter() - started
+
+
+def run_benchmark(scale, latency, seed, settings, mock=False):
+    """Run the report once at a scale and return its measurements."""
+    data = None if mock else FakeJiraData(scale, seed)
+    with tempfile.TemporaryDirectory(prefix='kpi_benchmark_') as workdir:
+        if mock:
+            process, wall_seconds = run_report_command(scale, seed, settings, workdir)
+            request_count = 0
+        else:
+            with FakeJiraServer(data, latency) as server:
+                process, wall_seconds = run_report_command(scale, seed, settings, workdir, server.url)
+                request_count = server.request_count
+
+    result_lines = [line for line in process.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if process.returncode != 0 or not result_lines:
+        raise RuntimeError(f"Report run at scale {scale} failed:\n{process.stdout[-2000:]}{process.stderr[-2000:]}")
+    result = json.loads(result_lines[-1][len(RESULT_MARKER):])
+    run_summary = result['run_summary']
+    return {
+        'scale': scale,
+        'members': result['members'],
+        'issues': run_summary['counters'].get('tasks', 0) if mock else data.task_issue_count,
+        'worklogs': 0 if mock else len(data.worklogs),
+        'latency': 0.0 if mock else latency,
+        'wall_seconds': round(wall_seconds, 2),
+        'report_seconds': run_summary['total_seconds'],
+        'requests': request_count,
+        'peak_rss_mb': result['peak_rss_mb'],
+        'phases': {name: phase['seconds'] for name, phase in run_summary['phases'].items()},
+        'counters': run_summary['counters'],
+    }
+
+
+def print_results(results):
+    print(f"{'Scale':>6} {'Members':>8} {'Issues':>8} {'Worklogs':>9} {'Wall s':>8} {'Report s':>9} {'Requests':>9} {'Peak RSS MB':>12}")
+    for result in results:
+        print(f"{result['scale']:>5}x {result['members']:>8} {result['issues']:>8} {result['worklogs']:>9} "
+              f"{result['wall_seconds']:>8.2f} {result['report_seconds']:>9.2f} {result['requests']:>9} "
+              f"{result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-':>12}")
+    for result in results:
+        phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in result['phases'].items())
+        print(f"  {result['scale']}x phases: {phases}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the KPI report end to end against a local fake Jira server.")
+    parser.add_argument('--scales', type=lambda value: [int(scale) for scale in value.split(',')], default=DEFAULT_SCALES,
+                        help="comma separated team/issue volume multipliers (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY,
+                        help="seconds the fake server waits before answering each request (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="seed of the synthetic data set")
+    parser.add_argument('--set', dest='settings', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="override a jira_kpi_report setting with a Python literal, e.g. USE_ASYNC_TRANSPORT=False")
+    parser.add_argument('--mock', action='store_true',
+                        help="run on the report's synthetic mock data instead of the fake server (no Jira requests)")
+    parser.add_argument('--json', dest='json_path', help="also write the results to this JSON file")
+    # Used by the benchmark to start the report process
+    parser.add_argument('--run-report', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument('--server', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_report:
+        run_report_process(args)
+        return
+
+    results = []
+    for scale in args.scales:
+        if args.mock:
+            print(f"Running the report on synthetic mock data at {scale}x volume...", flush=True)
+        else:
+            print(f"Running the report at {scale}x volume (latency {args.latency}s per request)...", flush=True)
+        results.append(run_benchmark(scale, args.latency, args.seed, args.settings, args.mock))
+    print()
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as json_file:
+            json.dump({'settings': {name: value for name, value in args.settings}, 'results': results}, json_file, indent=2)
+        print(f"\nResults saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
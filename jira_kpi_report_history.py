@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite-backed KPI history of closed sprints for the KPI report.
+
+Once a sprint with absolute dates has ended, the report freezes it here: the task records
+of every team, member and category, the per-member status counts and story points, and the
+tracked hours. Later runs rebuild frozen sprints from the stored task records instead of
+fetching them from Jira again, so their numbers no longer change.
+
+Sprints are identified by their (sprint_start, sprint_end) date strings, as configured in
+the report (e.g. '2024-05-06', '2024-05-19 23:59'). The member_sprint_kpis view sums tasks,
+story points and hours per sprint, team and member for ad-hoc questions:
+
+    python jira_kpi_report_history.py --sprints
+    python jira_kpi_report_history.py "SELECT team, sprint_start, SUM(tasks), SUM(hours) FROM member_sprint_kpis GROUP BY 1, 2"
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_HISTORY_PATH = "jira_kpi_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sprint_teams (
+    sprint_start TEXT NOT NULL,
+    sprint_end TEXT NOT NULL,
+    team TEXT NOT NULL,
+    frozen_at TEXT NOT NULL,
+    PRIMARY KEY (sprint_start, sprint_end, team)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    sprint_start TEXT NOT NULL,
+    sprint_end TEXT NOT NULL,
+    team TEXT NOT NULL,
+    category TEXT NOT NULL,
+    member TEXT NOT NULL,
+    key TEXT NOT NULL,
+    summary TEXT,
+    status TEXT,
+    status_category TEXT,
+    assignee TEXT,
+    story_points REAL,
+    status_category_changed_date TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_sprint_team ON tasks (sprint_start, sprint_end, team);
+CREATE TABLE IF NOT EXISTS member_status_counts (
+    sprint_start TEXT NOT NULL,
+    sprint_end TEXT NOT NULL,
+    team TEXT NOT NULL,
+    category TEXT NOT NULL,
+    member TEXT NOT NULL,
+    status_category TEXT NOT NULL,
+    tasks INTEGER NOT NULL,
+    PRIMARY KEY (sprint_start, sprint_end, team, category, member, status_category)
+);
+CREATE TABLE IF NOT EXISTS member_story_points (
+    sprint_start TEXT NOT NULL,
+    sprint_end TEXT NOT NULL,
+    team TEXT NOT NULL,
+    category TEXT NOT NULL,
+    member TEXT NOT NULL,
+    story_points REAL NOT NULL,
+    PRIMARY KEY (sprint_start, sprint_end, team, category, member)
+);
+CREATE TABLE IF NOT EXISTS member_hours (
+    sprint_start TEXT NOT NULL,
+    sprint_end TEXT NOT NULL,
+    team TEXT NOT NULL,
+    member TEXT NOT NULL,
+    hours REAL NOT NULL,
+    PRIMARY KEY (sprint_start, sprint_end, team, member)
+);
+CREATE VIEW IF NOT EXISTS member_sprint_kpis AS
+SELECT h.sprint_start, h.sprint_end, h.team, h.member,
+       COALESCE(c.tasks, 0) AS tasks, COALESCE(p.story_points, 0) AS story_points, h.hours
+FROM member_hours h
+LEFT JOIN (SELECT sprint_start, sprint_end, team, member, SUM(tasks) AS tasks
+           FROM member_status_counts GROUP BY sprint_start, sprint_end, team, member) c
+       USING (sprint_start, sprint_end, team, member)
+LEFT JOIN (SELECT sprint_start, sprint_end, team, member, SUM(story_points) AS story_points
+           FROM member_story_points GROUP BY sprint_start, sprint_end, team, member) p
+       USING (sprint_start, sprint_end, team, member);
+"""
+
+TASK_COLUMNS = [('Key', 'key'), ('Summary', 'summary'), ('Status', 'status'), ('StatusCategory', 'status_category'),
+                ('Assignee', 'assignee'), ('StoryPoints', 'story_points'),
+                ('StatusCategoryChangedDate', 'status_category_changed_date')]
+
+
+class KpiHistory:
+    """History of frozen sprints; one row set per sprint and team."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def has_sprint(self, sprint_start, sprint_end, teams):
+        """True if the sprint has been frozen for every one of the given teams."""
+        teams = list(teams)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT COUNT(*) FROM sprint_teams WHERE sprint_start = ? AND sprint_end = ? "
+                f"AND team IN ({', '.join('?' * len(teams))})",
+                [sprint_start, sprint_end] + teams
+            ).fetchone()
+        return rows[0] == len(set(teams))
+
+    def save_sprint(self, sprint_start, sprint_end, team, category_tasks, category_status_counts, category_story_points, member_hours):
+        """
+        Freeze a team's sprint, replacing whatever was stored for it:
+        category_tasks {category: {member: [task, ...]}}, category_status_counts {category: {member: {status: count}}},
+        category_story_points {category: {member: story points}} and member_hours {member: hours}.
+        """
+        sprint = (sprint_start, sprint_end, team)
+        with self.lock, self.connection:
+            for table in ('sprint_teams', 'tasks', 'member_status_counts', 'member_story_points', 'member_hours'):
+                self.connection.execute(f"DELETE FROM {table} WHERE sprint_start = ? AND sprint_end = ? AND team = ?", sprint)
+            self.connection.executemany(
+                f"INSERT INTO tasks (sprint_start, sprint_end, team, category, member, {', '.join(column for _, column in TASK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (5 + len(TASK_COLUMNS)))})",
+                [sprint + (category, member) + tuple(task.get(field) for field, _ in TASK_COLUMNS)
+                 for category, tasks_by_member in category_tasks.items()
+                 for member, tasks in tasks_by_member.items()
+                 for task in tasks]
+            )
+            self.connection.executemany(
+                "INSERT INTO member_status_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [sprint + (category, member, status, count)
+                 for category, counts_by_member in category_status_counts.items()
+                 for member, status_counts in counts_by_member.items()
+                 for status, count in status_counts.items()]
+            )
+            self.connection.executemany(
+                "INSERT INTO member_story_points VALUES (?, ?, ?, ?, ?, ?)",
+                [sprint + (category, member, story_points)
+                 for category, story_points_by_member in category_story_points.items()
+                 for member, story_points in story_points_by_member.items()]
+            )
+            self.connection.executemany("INSERT INTO member_hours VALUES (?, ?, ?, ?, ?)",
+                                        [sprint + (member, hours) for member, hours in member_hours.items()])
+            self.connection.execute("INSERT INTO sprint_teams VALUES (?, ?, ?, ?)", sprint + (datetime.now().isoformat(timespec='seconds'),))
+
+    def load_sprint_tasks(self, sprint_start, sprint_end, team):
+        """Return the frozen task records of a team's sprint as {category: {member: [task, ...]}}, in stored order."""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT category, member, {', '.join(column for _, column in TASK_COLUMNS)} FROM tasks "
+                f"WHERE sprint_start = ? AND sprint_end = ? AND team = ? ORDER BY rowid",
+                (sprint_start, sprint_end, team)
+            ).fetchall()
+        category_tasks = {}
+        for row in rows:
+            task = {field: value for (field, _), value in zip(TASK_COLUMNS, row[2:])}
+            category_tasks.setdefault(row[0], {}).setdefault(row[1], []).append(task)
+        return category_tasks
+
+    def load_sprint_hours(self, sprint_start, sprint_end, team):
+        """Return the frozen tracked hours of a team's sprint as {member: hours}."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT member, hours FROM member_hours WHERE sprint_start = ? AND sprint_end = ? AND team = ?",
+                (sprint_start, sprint_end, team)
+            ).fetchall()
+        return dict(rows)
+
+    def query(self, sql, parameters=()):
+        """Run an SQL query; returns (column names, rows)."""
+        with self.lock:
+            cursor = self.connection.execute(sql, parameters)
+            rows = cursor.fetchall()
+        return [column[0] for column in cursor.description or []], rows
+
+
+def format_table(columns, rows):
+    """Format query results as an aligned text table."""
+    cells = [[str(column) for column in columns]] + [['' if value is None else str(value) for value in row] for row in rows]
+    widths = [max(len(row[index]) for row in cells) for index in range(len(columns))]
+    lines = ['  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in cells]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the KPI history of frozen sprints.")
+    parser.add_argument('sql', nargs='?', help="SQL query, e.g. over the member_sprint_kpis view or the tasks table")
+    parser.add_argument('--db', default=DEFAULT_HISTORY_PATH, help="history database (default: %(default)s)")
+    parser.add_argument('--sprints', action='store_true', help="list the frozen sprints and their teams")
+    args = parser.parse_args(argv)
+    if not args.sql and not args.sprints:
+        parser.error("give an SQL query or --sprints")
+    if not os.path.exists(args.db):
+        parser.error(f"no KPI history database at {args.db}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sql = args.sql
+    if args.sprints:
+        sql = ("SELECT sprint_start, sprint_end, COUNT(*) AS teams, MAX(frozen_at) AS frozen_at "
+               "FROM sprint_teams GROUP BY sprint_start, sprint_end ORDER BY sprint_start")
+    history = KpiHistory(args.db)
+    try:
+        started = time.perf_counter()
+        columns, rows = history.query(sql)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except sqlite3.Error as e:
+        sys.exit(f"Query failed: {e}")
+    finally:
+        history.close()
+    if columns:
+        print(format_table(columns, rows))
+    print(f"({len(rows)} rows, {elapsed_ms:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite-backed local store of Jira issues for the KPI report.
+
+Issues are stored per "view" (the JQL query that returned them) as raw JSON, keyed by
+issue key and `updated` timestamp. A run only needs to ask Jira for issues updated
+since the last sync and can still serve every view from the store if Jira is down.
+
+Worklogs from Jira's bulk worklog feed are stored as compact rows, together with the
+feed position (`since`) to continue from, the point the feed was first read from (the
+stored worklogs are complete from there on) and the project of every issue they belong to.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS view_issues (
+    view TEXT NOT NULL,
+    key TEXT NOT NULL,
+    updated TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (view, key)
+);
+CREATE TABLE IF NOT EXISTS views (
+    view TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,
+    last_sync TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS worklogs (
+    id TEXT PRIMARY KEY,
+    issue_id TEXT NOT NULL,
+    author TEXT,
+    started TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    updated TEXT
+);
+CREATE INDEX IF NOT EXISTS worklogs_started ON worklogs (started);
+CREATE TABLE IF NOT EXISTS issue_projects (
+    issue_id TEXT PRIMARY KEY,
+    project_key TEXT,
+    project_name TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class IssueStore:
+    """Local issue store; safe to share between fetch worker threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_last_sync(self):
+        """Return the time of the last complete sync, or None if the store has never been synced."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM sync_state WHERE name = 'last_sync'").fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_last_sync(self, synced_at):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES ('last_sync', ?)",
+                                    (synced_at.isoformat(),))
+
+    def get_view_state(self, view):
+        """Return (fields, last_sync) of a stored view, or None if the view has never been synced."""
+        with self.lock:
+            row = self.connection.execute("SELECT fields, last_sync FROM views WHERE view = ?", (view,)).fetchone()
+        return (row[0], datetime.fromisoformat(row[1])) if row else None
+
+    def replace_view(self, view, fields, issues, synced_at):
+        """Store the complete result of a view, dropping whatever was stored for it before."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM view_issues WHERE view = ?", (view,))
+            self._upsert_issues(view, issues)
+            self._set_view_state(view, fields, synced_at)
+
+    def update_view(self, view, fields, changed_keys, issues, synced_at):
+        """
+        Apply an incremental sync to a view: changed_keys are all issues updated since the
+        last sync, issues are the changed issues that (still) match the view.
+        """
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM view_issues WHERE view = ? AND key = ?",
+                                        [(view, key) for key in changed_keys])
+            self._upsert_issues(view, issues)
+            self._set_view_state(view, fields, synced_at)
+
+    def get_view_issues(self, view):
+        """Return the stored raw issue dicts of a view, in the order they were stored."""
+        with self.lock:
+            rows = self.connection.execute("SELECT data FROM view_issues WHERE view = ? ORDER BY rowid", (view,)).fetchall()
+        return [json_loads(row[0]) for row in rows]
+
+    def _upsert_issues(self, view, issues):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO view_issues (view, key, updated, data) VALUES (?, ?, ?, ?)",
+            [(view, issue['key'], issue.get('fields', {}).get('updated'), json.dumps(issue)) for issue in issues]
+        )
+
+    def _set_view_state(self, view, fields, synced_at):
+        self.connection.execute("INSERT OR REPLACE INTO views (view, fields, last_sync) VALUES (?, ?, ?)",
+                                (view, fields, synced_at.isoformat()))
+
+    def get_worklog_since(self):
+        """Return the worklog feed position (epoch milliseconds) to continue from, or None."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM sync_state WHERE name = 'worklog_since'").fetchone()
+        return int(row[0]) if row else None
+
+    def get_worklog_covered_from(self):
+        """Return the feed position (epoch milliseconds) the stored worklogs were first read from, or None."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM sync_state WHERE name = 'worklog_covered_from'").fetchone()
+        return int(row[0]) if row else None
+
+    def apply_worklog_changes(self, worklogs, deleted_ids, since, covered_from):
+        """
+        Store updated worklogs (raw dicts from /worklog/list), drop deleted ones and move the feed position;
+        covered_from is the feed position the stored worklogs are complete from.
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO worklogs (id, issue_id, author, started, seconds, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [(str(worklog['id']), str(worklog['issueId']), (worklog.get('author') or {}).get('displayName'),
+                  worklog['started'], worklog.get('timeSpentSeconds', 0), worklog.get('updated'))
+                 for worklog in worklogs]
+            )
+            self.connection.executemany("DELETE FROM worklogs WHERE id = ?", [(str(worklog_id),) for worklog_id in deleted_ids])
+            self.connection.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES ('worklog_since', ?)", (str(since),))
+            self.connection.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES ('worklog_covered_from', ?)",
+                                    (str(covered_from),))
+
+    def get_worklogs(self, started_from, started_to, authors):
+        """
+        Return stored worklogs by the given authors started between two dates (inclusive)
+        as (issue_id, author, started, seconds) tuples.
+        """
+        authors = list(authors)
+        rows = []
+        with self.lock:
+            # Stay below SQLite's limit on the number of query parameters
+            for start in range(0, len(authors), 500):
+                chunk = authors[start:start + 500]
+                rows.extend(self.connection.execute(
+                    f"SELECT started, id, issue_id, author, seconds FROM worklogs "
+                    f"WHERE substr(started, 1, 10) BETWEEN ? AND ? AND author IN ({', '.join('?' * len(chunk))})",
+                    [started_from.isoformat(), started_to.isoformat()] + chunk
+                ).fetchall())
+        # Ordered by start time and id across all chunks
+        return [(issue_id, author, started, seconds) for started, _, issue_id, author, seconds in sorted(rows)]
+
+    def get_issue_projects(self, issue_ids):
+        """Return {issue_id: (project_key, project_name)} for the issue ids whose project is known."""
+        issue_ids = list(issue_ids)
+        projects = {}
+        with self.lock:
+            # Stay below SQLite's limit on the number of query parameters
+            for start in range(0, len(issue_ids), 500):
+                chunk = issue_ids[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT issue_id, project_key, project_name FROM issue_projects WHERE issue_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                projects.update({row[0]: (row[1], row[2]) for row in rows})
+        return projects
+
+    def set_issue_projects(self, issue_projects):
+        """Store {issue_id: (project_key, project_name)}."""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO issue_projects (issue_id, project_key, project_name) VALUES (?, ?, ?)",
+                [(issue_id, key, name) for issue_id, (key, name) in issue_projects.items()]
+            )
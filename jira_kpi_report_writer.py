@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Workbook writer backends for the KPI report.
+
+Both backends expose the part of the openpyxl Workbook API the report uses (create_sheet,
+sheet lookup by name, add_named_style, save) plus flush(sheet), which tells the writer that
+the rows written so far are final:
+
+- ReportWorkbook is a regular in-memory openpyxl workbook; flush() does nothing.
+- StreamingReportWorkbook uses openpyxl's write-only mode. Its sheets keep only the rows that
+  have not been flushed yet, so they can still be written cell by cell, styled, read for
+  max_row, merged and given charts, and stream every flushed row to disk. Memory use no longer grows with
+  the number of task rows.
+
+Column widths of a streaming sheet must be set before its first flush: they are written
+at the top of the sheet XML.
+"""
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.cell_range import CellRange
+
+
+class ReportWorkbook:
+    """In-memory openpyxl workbook, saved at the end."""
+
+    def __init__(self):
+        self.wb = openpyxl.Workbook()
+        # Remove the default sheet created by openpyxl.Workbook() to avoid "Sheet"
+        del self.wb[self.wb.active.title]
+
+    @property
+    def sheetnames(self):
+        return self.wb.sheetnames
+
+    def __getitem__(self, title):
+        return self.wb[title]
+
+    def create_sheet(self, title, index=None):
+        return self.wb.create_sheet(title, index)
+
+    def add_named_style(self, style):
+        self.wb.add_named_style(style)
+
+    @property
+    def cell_count(self):
+        """Number of cells in the workbook."""
+        return sum(len(ws._cells) for ws in self.wb.worksheets)
+
+    def flush(self, sheet, before_row=None):
+        """Mark the rows of a sheet above before_row (all rows if None) as final."""
+
+    def save(self, path):
+        self.wb.save(path)
+
+
+class StreamingSheet:
+    """
+    Write-only worksheet with a window of pending rows.
+    Pending rows can be written and styled in any order; flush() writes them out in row order.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.title = ws.title
+        self.column_dimensions = ws.column_dimensions
+        self.pending_rows = {}  # row -> {column: cell}
+        self.next_row = 1  # first row that has not been written out yet
+        self.last_row = 0
+        self.cell_count = 0
+
+    @property
+    def max_row(self):
+        return max(1, self.last_row)
+
+    def cell(self, row, column, value=None):
+        if row < self.next_row:
+            raise ValueError(f"Row {row} of sheet '{self.title}' has already been written")
+        row_cells = self.pending_rows.setdefault(row, {})
+        cell = row_cells.get(column)
+        if cell is None:
+            cell = row_cells[column] = WriteOnlyCell(self.ws)
+            self.cell_count += 1
+        if value is not None:
+            cell.value = value
+        self.last_row = max(self.last_row, row)
+        return cell
+
+    @property
+    def sheet_state(self):
+        return self.ws.sheet_state
+
+    @sheet_state.setter
+    def sheet_state(self, state):
+        self.ws.sheet_state = state
+
+    def add_chart(self, chart, anchor=None):
+        self.ws.add_chart(chart, anchor)
+
+    def merge_cells(self, start_row, start_column, end_row, end_column):
+        self.ws.merged_cells.add(CellRange(min_row=start_row, min_col=start_column,
+                                           max_row=end_row, max_col=end_column))
+
+    def flush(self, before_row=None):
+        end_row = self.last_row + 1 if before_row is None else before_row
+        for row in range(self.next_row, end_row):
+            row_cells = self.pending_rows.pop(row, {})
+            self.ws.append([row_cells.get(column) for column in range(1, max(row_cells, default=0) + 1)])
+        self.next_row = max(self.next_row, end_row)
+
+
+class StreamingReportWorkbook:
+    """openpyxl write-only workbook whose sheets stream flushed rows to disk."""
+
+    def __init__(self):
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.sheets = {}
+
+    @property
+    def sheetnames(self):
+        return self.wb.sheetnames
+
+    def __getitem__(self, title):
+        return self.sheets[title]
+
+    def create_sheet(self, title, index=None):
+        sheet = StreamingSheet(self.wb.create_sheet(title, index))
+        self.sheets[title] = sheet
+        return sheet
+
+    def add_named_style(self, style):
+        self.wb.add_named_style(style)
+
+    @property
+    def cell_count(self):
+        """Number of cells written to the workbook."""
+        return sum(sheet.cell_count for sheet in self.sheets.values())
+
+    def flush(self, sheet, before_row=None):
+        """Write out the rows of a sheet above before_row (all rows if None); they can't be changed afterwards."""
+        sheet.flush(before_row)
+
+    def save(self, path):
+        for sheet in self.sheets.values():
+            sheet.flush()
+        self.wb.save(path)
+
+
+WORKBOOK_BACKENDS = {
+    'openpyxl': ReportWorkbook,
+    'streaming': StreamingReportWorkbook,
+}
+
+
+def create_report_workbook(backend):
+    """Create a report workbook with the given backend ('openpyxl' or 'streaming')."""
+    if backend not in WORKBOOK_BACKENDS:
+        raise ValueError(f"Unknown workbook backend '{backend}', expected one of: {', '.join(WORKBOOK_BACKENDS)}")
+    return WORKBOOK_BACKENDS[backend]()
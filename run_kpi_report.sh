@@ -9,33 +9,38 @@ then
     exit 1
 fi
 
-# Install dependencies
-echo "📦 Installing Python dependencies..."
-python3 -m pip install -r requirements.txt
+# Install dependencies once; they are installed again only when requirements.txt changes
+# (delete .deps_installed to force a reinstall)
+DEPS_STAMP=".deps_installed"
+if [ ! -f "$DEPS_STAMP" ] || [ requirements.txt -nt "$DEPS_STAMP" ]; then
+    echo "📦 Installing Python dependencies..."
+    python3 -m pip install -r requirements.txt || exit 1
+    touch "$DEPS_STAMP"
+fi
 
 # Run the KPI report generator
 echo "🔄 Generating sprint report..."
-python3 jira_kpi_report.py
+python3 jira_kpi_report.py "$@"
+STATUS=$?
+if [ $STATUS -ne 0 ]; then
+    echo "❌ Error: the report run failed (exit status $STATUS)."
+    exit $STATUS
+fi
+
+# --check and --fetch-only don't write the report
+case " $* " in
+    *" --check "*|*" --fetch-only "*) exit 0 ;;
+esac
 
 # Check if the report file was created
 REPORT_FILE="sprint_report.xlsx"
 if [ -f "$REPORT_FILE" ]; then
     echo "✅ Report created: $REPORT_FILE"
 
-    # Run the pie chart enhancer
-    echo "📊 Adding pie charts..."
-    python3 jira_kpi_report_pie_gen.py
-
-    if [ $? -eq 0 ]; then
-        echo "✅ Pie charts added successfully."
-
-        # Auto-open on macOS
-        if [[ "$OSTYPE" == "darwin"* ]]; then
-            open "$REPORT_FILE"
-        fi
-    else
-        echo "❌ Pie chart generation failed."
+    # Auto-open on macOS
+    if [[ "$OSTYPE" == "darwin"* ]]; then
+        open "$REPORT_FILE"
     fi
 else
-    echo "❌ Error: Report file not found. Pie charts were not added."
+    echo "❌ Error: Report file not found."
 fi